@@ -9,6 +9,8 @@ import logging
 import os
 from typing import Optional
 
+from net import get_session
+
 logger = logging.getLogger(__name__)
 
 
@@ -43,9 +45,8 @@ def send_telegram(message: str) -> bool:
     if not AlertConfig.TELEGRAM_TOKEN or not AlertConfig.TELEGRAM_CHAT_ID:
         return False
     try:
-        import requests
         url = f"https://api.telegram.org/bot{AlertConfig.TELEGRAM_TOKEN}/sendMessage"
-        resp = requests.post(url, json={
+        resp = get_session().post(url, json={
             "chat_id": AlertConfig.TELEGRAM_CHAT_ID,
             "text": message,
             "parse_mode": "HTML",
@@ -85,7 +86,6 @@ def send_webhook(message: str, article: dict) -> bool:
     if not AlertConfig.WEBHOOK_URL:
         return False
     try:
-        import requests
         payload = {
             "text": message,
             "article": {
@@ -96,7 +96,7 @@ def send_webhook(message: str, article: dict) -> bool:
                 "source": article.get("source"),
             }
         }
-        resp = requests.post(AlertConfig.WEBHOOK_URL, json=payload, timeout=10)
+        resp = get_session().post(AlertConfig.WEBHOOK_URL, json=payload, timeout=10)
         return resp.status_code in (200, 204)
     except Exception as e:
         logger.error(f"Webhook alert failed: {e}")
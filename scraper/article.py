@@ -0,0 +1,150 @@
+"""
+article.py - Memory-lean article record.
+
+Article is a drop-in replacement for the article dicts passed between
+sources, storage, scoring, alerts and the renderer: it supports the
+same mapping operations (a["x"], a.get, "x" in a, items(), ...), but
+
+  - known fields live in __slots__ (no per-article hash table);
+  - source / sentiment label / keyword phrases are interned strings,
+    and themes / matched_keywords are shared, interned tuples, so the
+    thousands of articles with the same themes hold one object;
+  - content can stay off-heap: an article loaded from the snapshot only
+    holds an (offset, length) reference into a memory-mapped
+    ContentStore, decoded when a stage actually reads it.
+
+Unknown keys still work (kept in a small per-article dict).
+"""
+
+import mmap
+import sys
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+FIELDS = (
+    "source", "title", "link", "published_date", "published_ts", "scrape_timestamp",
+    "content", "score", "themes", "is_relevant",
+    # cached analysis (scoring._set_analysis)
+    "score_sentiment", "sentiment_label", "keyword_counts", "doc_len", "score_key",
+    # near-duplicate clustering (neardup.py)
+    "minhash", "duplicates",
+    # per-run scores (scoring._set_scores)
+    "score_relevance", "matched_keywords", "score_combined", "score_normalized",
+    "alert_threshold",
+)
+_FIELD_SET = frozenset(FIELDS)
+_INTERNED = frozenset(("source", "sentiment_label"))
+_SHARED_TUPLES = frozenset(("themes", "matched_keywords"))
+
+_MISSING = object()
+_tuples: dict[tuple, tuple] = {}
+
+
+def _shared_tuple(values) -> tuple:
+    t = tuple(sys.intern(v) for v in values)
+    return _tuples.setdefault(t, t)
+
+
+class ContentStore:
+    """Read-only UTF-8 blob mapped in memory; articles reference slices of it."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            size = f.seek(0, 2)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def raw(self, offset: int, length: int) -> bytes:
+        return self._mm[offset:offset + length]
+
+    def text(self, offset: int, length: int) -> str:
+        return self.raw(offset, length).decode("utf-8")
+
+
+class Article(MutableMapping):
+    __slots__ = FIELDS + ("_content_ref", "_extra")
+
+    def __init__(self, fields: Optional[dict] = None, **kwargs):
+        self._content_ref: Optional[tuple[ContentStore, int, int]] = None
+        self._extra: Optional[dict[str, Any]] = None
+        if fields:
+            self.update(fields)
+        if kwargs:
+            self.update(kwargs)
+
+    def set_content_ref(self, store: ContentStore, offset: int, length: int) -> None:
+        """Content lives in `store`; nothing is decoded until it is read."""
+        try:
+            delattr(self, "content")
+        except AttributeError:
+            pass
+        self._content_ref = (store, offset, length)
+
+    def content_bytes(self) -> bytes:
+        """UTF-8 content, copied straight from the store when off-heap."""
+        if self._content_ref is not None:
+            store, offset, length = self._content_ref
+            return store.raw(offset, length)
+        return self.get("content", "").encode("utf-8")
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            value = getattr(self, key, _MISSING)
+            if value is _MISSING:
+                if key == "content" and self._content_ref is not None:
+                    store, offset, length = self._content_ref
+                    return store.text(offset, length)
+                raise KeyError(key)
+            return value
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in _FIELD_SET:
+            if key in _INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            elif key in _SHARED_TUPLES and value is not None:
+                value = _shared_tuple(value)
+            elif key == "keyword_counts" and value is not None:
+                value = {sys.intern(k): n for k, n in value.items()}
+            elif key == "content":
+                self._content_ref = None
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in _FIELD_SET:
+            if key == "content" and self._content_ref is not None:
+                self._content_ref = None
+                return
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        if key in _FIELD_SET:
+            return hasattr(self, key) or (key == "content" and self._content_ref is not None)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self) -> Iterator[str]:
+        for key in FIELDS:
+            if key in self:
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"Article(source={self.get('source')!r}, title={self.get('title', '')[:60]!r})"
@@ -0,0 +1,64 @@
+"""
+backfill.py - Re-score archived data.json snapshots or day segments in one go.
+
+Usage:
+  python scraper/backfill.py snapshots/*.json data/*.jsonl --out backfill.json [--workers N]
+
+Articles from all snapshots are merged (same link/title dedup as storage),
+tokenized on N processes (default: every core), then normalized together.
+Output is identical to a serial run (--workers 1).
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from scoring import score_articles
+from storage import deduplicate
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger("backfill")
+
+
+def load_snapshots(paths: list[str]) -> list[dict]:
+    corpus: list[dict] = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                articles = [json.loads(line) for line in f if line.strip()]
+            else:
+                articles = json.load(f).get("articles", [])
+        deduplicate(corpus, articles)
+    return corpus
+
+
+def run(paths: list[str], out: str, workers: int, backend: str) -> None:
+    articles = load_snapshots(paths)
+    logger.info(f"Loaded {len(articles)} unique articles from {len(paths)} snapshots")
+
+    started = time.perf_counter()
+    score_articles(articles, [], backend=backend, workers=workers)
+    logger.info(f"Scored in {time.perf_counter() - started:.1f}s with {workers} worker(s)")
+
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"articles": articles}, f, ensure_ascii=False)
+    logger.info(f"Wrote {out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("snapshots", nargs="+", help="archived data.json files or .jsonl day segments")
+    parser.add_argument("--out", required=True, help="output JSON file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backend", choices=("python", "numpy"), default="python")
+    args = parser.parse_args()
+    run(args.snapshots, args.out, args.workers, args.backend)
@@ -0,0 +1,129 @@
+"""
+bench_extract.py - Per-page parse time: lxml extractor vs the old html.parser path.
+
+Usage:
+  python scraper/bench_extract.py --save URL [URL ...]   # store live pages locally
+  python scraper/bench_extract.py [--repeat N]           # benchmark all fixtures
+
+Committed fixtures live in scraper/bench_pages/: small synthetic pages that
+reproduce the layouts the extractor has to handle (<article>, article-body and
+story-body classes, an "article" id, <main>, and a paywall teaser that falls
+back to paragraphs on a latin-1 page). Pages saved with --save go to
+.cache/pages/ (not committed: they are third-party pages) and are benchmarked
+alongside them.
+"""
+
+import argparse
+import hashlib
+import statistics
+import sys
+import os
+import re
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bs4 import BeautifulSoup
+
+from cache import CACHE_DIR
+from extract import extract_text
+
+FIXTURE_DIR = Path(__file__).parent / "bench_pages"
+SAVED_DIR = CACHE_DIR / "pages"
+
+_META_CHARSET = re.compile(rb"<meta[^>]+charset=[\"']?([\w-]+)", re.IGNORECASE)
+
+
+def extract_text_bs4(html: str) -> str:
+    """Reference: the BeautifulSoup(html.parser) extractor this benchmark replaces."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    for tag in soup(["script", "style", "nav", "header", "footer", "aside", "form"]):
+        tag.decompose()
+
+    candidates = [
+        soup.find("article"),
+        soup.find(class_=lambda c: c and "article-body" in c.lower()),
+        soup.find(class_=lambda c: c and "story-body" in c.lower()),
+        soup.find(id=lambda i: i and "article" in i.lower()),
+        soup.find("main"),
+    ]
+
+    for candidate in candidates:
+        if candidate:
+            text = candidate.get_text(separator=" ", strip=True)
+            if len(text) > 200:
+                return text[:8000]
+
+    paragraphs = soup.find_all("p")
+    text = " ".join(p.get_text(strip=True) for p in paragraphs)
+    return text[:8000]
+
+
+def save_fixtures(urls: list[str]) -> None:
+    from net import get_session
+    from sources import HEADERS
+
+    SAVED_DIR.mkdir(parents=True, exist_ok=True)
+    for url in urls:
+        resp = get_session().get(url, headers=HEADERS, timeout=10)
+        resp.raise_for_status()
+        name = hashlib.sha1(url.encode()).hexdigest()[:12] + ".html"
+        (SAVED_DIR / name).write_bytes(resp.content)
+        print(f"saved {url} -> {name} ({len(resp.content):,} bytes)")
+
+
+def _decode(raw: bytes) -> str:
+    """Decode a page the way the old path received it: text in the declared charset."""
+    match = _META_CHARSET.search(raw[:4096])
+    charset = match.group(1).decode() if match else "utf-8"
+    try:
+        return raw.decode(charset, errors="replace")
+    except LookupError:
+        return raw.decode("utf-8", errors="replace")
+
+
+def _time_ms(fn, arg, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        runs.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(runs)
+
+
+def run_benchmark(repeat: int) -> None:
+    pages = sorted(FIXTURE_DIR.glob("*.html")) + sorted(SAVED_DIR.glob("*.html"))
+    if not pages:
+        print(f"No fixtures in {FIXTURE_DIR} or {SAVED_DIR}. Save some with --save URL ...")
+        return
+
+    width = max(len(page.name) for page in pages) + 2
+    print(f"{'page':<{width}}{'bytes':>10}{'bs4 ms':>10}{'lxml ms':>10}{'speedup':>9}  same")
+    total_old = total_new = 0.0
+    for page in pages:
+        raw = page.read_bytes()
+        text = _decode(raw)
+        old_ms = _time_ms(extract_text_bs4, text, repeat)
+        new_ms = _time_ms(extract_text, raw, repeat)
+        same = extract_text_bs4(text) == extract_text(raw)
+        total_old += old_ms
+        total_new += new_ms
+        print(f"{page.name:<{width}}{len(raw):>10,}{old_ms:>10.2f}{new_ms:>10.2f}"
+              f"{old_ms / max(new_ms, 1e-9):>8.1f}x  {'yes' if same else 'no'}")
+
+    print(f"{'total':<{width + 10}}{total_old:>10.2f}{total_new:>10.2f}"
+          f"{total_old / max(total_new, 1e-9):>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--save", nargs="+", metavar="URL", help="download pages as fixtures")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per page (median reported)")
+    args = parser.parse_args()
+
+    if args.save:
+        save_fixtures(args.save)
+    else:
+        run_benchmark(args.repeat)
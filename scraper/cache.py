@@ -0,0 +1,89 @@
+"""
+cache.py - Small persisted key/value caches shared across runs.
+
+Files live under .cache/ at the repo root. They are not committed: the
+workflow restores and saves that directory with actions/cache, so losing
+it only costs one full (uncached) run.
+"""
+
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = Path(__file__).parent.parent / ".cache"
+
+
+class JsonCache:
+    """
+    Thread-safe dict persisted as a single JSON file.
+    Loaded lazily on first access, written back atomically by save().
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data: Optional[dict[str, Any]] = None
+        self._dirty = False
+
+    def _ensure_loaded(self) -> dict[str, Any]:
+        if self._data is None:
+            self._data = {}
+            if self.path.exists():
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._data = json.load(f)
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable cache {self.path.name}: {e}")
+        return self._data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._ensure_loaded().get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._ensure_loaded()[key] = value
+            self._dirty = True
+
+    def prune(self, is_expired: Callable[[Any], bool]) -> int:
+        """Drop entries whose value matches is_expired. Returns how many were dropped."""
+        with self._lock:
+            data = self._ensure_loaded()
+            expired = [key for key, value in data.items() if is_expired(value)]
+            for key in expired:
+                del data[key]
+            if expired:
+                self._dirty = True
+            return len(expired)
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty or self._data is None:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            try:
+                # One dumps + write: json.dump's many small writes are several times slower
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(json.dumps(self._data, ensure_ascii=False, separators=(",", ":")))
+                tmp_path.replace(self.path)
+                self._dirty = False
+            except Exception as e:
+                logger.error(f"Failed to save cache {self.path.name}: {e}")
+                if tmp_path.exists():
+                    tmp_path.unlink()
+
+
+# Per-feed HTTP validators: {feed_url: {"etag": ..., "modified": ...}}
+feed_cache = JsonCache(CACHE_DIR / "feeds.json")
+
+# Extracted article text: {canonical_url: {"text": ..., "status": http_code, "ts": epoch}}
+content_cache = JsonCache(CACHE_DIR / "content.json")
+
+# Rendered dashboard card fragments (everything but the scores):
+# {article_id: {"key": fields hash, "fragment": [html segments], "ts": published_ts}}
+card_cache = JsonCache(CACHE_DIR / "cards.json")
@@ -0,0 +1,74 @@
+"""
+dates.py - Article timestamps, parsed once.
+
+make_article() stores `published_ts` (UTC epoch seconds of publication,
+scrape time when the feed gives no usable date). Storage, retention,
+charts and date filters all read that field instead of re-parsing
+`published_date` strings on every run.
+"""
+
+import calendar
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+DATE_FORMATS = (
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%SZ",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+)
+
+
+def parse_date(date_str: str) -> Optional[datetime]:
+    """RFC 2822 (RSS) or ISO-like date string -> aware UTC datetime, or None."""
+    if not date_str:
+        return None
+    dt = None
+    try:
+        dt = parsedate_to_datetime(date_str)
+    except (TypeError, ValueError, IndexError):
+        for fmt in DATE_FORMATS:
+            try:
+                dt = datetime.strptime(date_str, fmt)
+                break
+            except ValueError:
+                continue
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def struct_to_ts(parsed: Optional[time.struct_time]) -> Optional[float]:
+    """feedparser's *_parsed fields (UTC struct_time) -> epoch seconds."""
+    if not parsed:
+        return None
+    return float(calendar.timegm(parsed))
+
+
+def article_ts(article: dict) -> float:
+    """
+    published_ts of an article. Articles stored before the field existed
+    get it computed here once (then cached on the dict).
+    """
+    ts = article.get("published_ts")
+    if ts is None:
+        dt = parse_date(article.get("published_date", ""))
+        if dt is None:
+            try:
+                dt = datetime.fromisoformat(article.get("scrape_timestamp", ""))
+            except ValueError:
+                dt = datetime.now(timezone.utc)
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+        ts = dt.timestamp()
+        article["published_ts"] = ts
+    return ts
+
+
+def ts_day(ts: float) -> str:
+    """UTC day (YYYY-MM-DD) of an epoch timestamp."""
+    return datetime.fromtimestamp(ts, timezone.utc).date().isoformat()
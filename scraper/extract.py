@@ -0,0 +1,112 @@
+"""
+extract.py - Article text extraction on lxml's C parser.
+
+One pass strips boilerplate, one compiled XPath collects every body
+candidate, and text collection stops as soon as MAX_CHARS is reached.
+Pages can be fed chunk by chunk as they arrive off the network.
+"""
+
+from typing import Iterable, Optional, Union
+
+from lxml import etree
+
+MAX_CHARS = 8000         # Cap at ~8k chars to keep RAM low
+MIN_BODY_CHARS = 200     # A candidate shorter than this is not the article body
+
+BOILERPLATE_TAGS = ("script", "style", "nav", "header", "footer", "aside", "form")
+
+_LOWER = "translate({}, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+
+# Body candidates, in priority order. All evaluated by a single XPath below.
+_CANDIDATE_TESTS = [
+    ("article", lambda el: el.tag == "article"),
+    ("article-body", lambda el: "article-body" in (el.get("class") or "").lower()),
+    ("story-body", lambda el: "story-body" in (el.get("class") or "").lower()),
+    ("article-id", lambda el: "article" in (el.get("id") or "").lower()),
+    ("main", lambda el: el.tag == "main"),
+]
+
+_CANDIDATES = etree.XPath(
+    "//article"
+    f" | //*[contains({_LOWER.format('@class')}, 'article-body')]"
+    f" | //*[contains({_LOWER.format('@class')}, 'story-body')]"
+    f" | //*[contains({_LOWER.format('@id')}, 'article')]"
+    " | //main"
+)
+_PARAGRAPHS = etree.XPath("//p")
+
+
+def _capped_join(pieces, sep: str, max_chars: int) -> str:
+    """Join pieces with sep, stopping once max_chars are collected."""
+    out = []
+    total = 0
+    for piece in pieces:
+        out.append(piece)
+        total += len(piece) + len(sep)
+        if total - len(sep) >= max_chars:
+            break
+    return sep.join(out)[:max_chars]
+
+
+def _stripped_strings(el):
+    for s in el.itertext():
+        s = s.strip()
+        if s:
+            yield s
+
+
+def extract_from_tree(root, max_chars: int = MAX_CHARS) -> str:
+    """Extract main text content from a parsed HTML tree (modified in place)."""
+    if root is None:
+        return ""
+
+    # Remove boilerplate
+    etree.strip_elements(root, *BOILERPLATE_TAGS, with_tail=False)
+
+    # First match in document order for each candidate kind
+    first: dict[str, etree._Element] = {}
+    for el in _CANDIDATES(root):
+        for kind, test in _CANDIDATE_TESTS:
+            if kind not in first and test(el):
+                first[kind] = el
+
+    for kind, _ in _CANDIDATE_TESTS:
+        candidate = first.get(kind)
+        if candidate is not None:
+            text = _capped_join(_stripped_strings(candidate), " ", max_chars)
+            if len(text) > MIN_BODY_CHARS:
+                return text
+
+    # Fallback: all paragraphs
+    paragraphs = ("".join(_stripped_strings(p)) for p in _PARAGRAPHS(root))
+    return _capped_join(paragraphs, " ", max_chars)
+
+
+def extract_from_chunks(
+    chunks: Iterable[bytes], encoding: Optional[str] = None, max_chars: int = MAX_CHARS
+) -> str:
+    """
+    Extract main text content from a page delivered as byte chunks.
+    Each chunk goes to lxml's incremental parser as soon as it arrives, so the
+    raw page is never held in memory as a whole. Without an explicit `encoding`
+    (from the HTTP header) lxml honours the page's own <meta charset>.
+    """
+    parser = etree.HTMLParser(encoding=encoding, remove_comments=True)
+    fed = False
+    for chunk in chunks:
+        if chunk:
+            parser.feed(chunk)
+            fed = True
+    if not fed:
+        return ""
+    return extract_from_tree(parser.close(), max_chars)
+
+
+def extract_text(
+    html: Union[bytes, str], encoding: Optional[str] = None, max_chars: int = MAX_CHARS
+) -> str:
+    """Extract main text content from a whole page held in memory."""
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+        encoding = "utf-8"
+    return extract_from_chunks([html], encoding, max_chars)
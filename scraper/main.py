@@ -10,11 +10,14 @@ import os
 # Ensure scraper/ is importable when run from repo root
 sys.path.insert(0, os.path.dirname(__file__))
 
-from sources import fetch_all_articles
-from scoring import score_articles, get_top_articles
-from storage import update_storage, load_data
+from sources import fetch_all_articles, save_caches
+from scoring import score_articles
+from storage import (
+    update_storage, load_data, save_data, load_corpus_stats, seen_index,
+    corpus_digest, load_status, save_status, top_stored_articles,
+)
 from alerts import check_and_alert
-from renderer import generate
+from renderer import RENDER_VERSION, generate
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,32 +28,53 @@ logger = logging.getLogger("main")
 
 TOP_N = 20
 ENRICH_CONTENT = True  # Set False to skip full-page fetching (faster, less info)
+SCORING_BACKEND = "python"  # "numpy" for the vectorized batch engine (pip install numpy)
 
 
 def run():
     logger.info("=== Macro Lab scrape cycle starting ===")
 
-    # 1. Fetch fresh articles from all sources
-    new_articles = fetch_all_articles(enrich_content=ENRICH_CONTENT)
+    # 1. Fetch fresh articles from all sources (already-stored ones dropped before enrichment)
+    data = load_data()
+    new_articles = fetch_all_articles(
+        enrich_content=ENRICH_CONTENT, seen=seen_index(data.get("articles", []))
+    )
     logger.info(f"Fetched {len(new_articles)} articles total")
 
     if not new_articles:
-        logger.warning("No articles fetched. Exiting.")
-        return
-
-    # 2. Storage: purge old, deduplicate, persist
-    all_articles, truly_new = update_storage(new_articles)
+        # The usual quiet hour (304s, only already-stored items): still purge,
+        # rescore and compare digests, so expired articles leave the store and
+        # the page follows the UTC day.
+        logger.info("No new articles fetched (feeds unchanged, failed or already stored)")
+
+    # 2. Storage: purge old, deduplicate (persisted after scoring)
+    stats = load_corpus_stats(data)
+    all_articles, truly_new = update_storage(new_articles, data, save=False, stats=stats)
     logger.info(f"Storage: {len(all_articles)} total articles, {len(truly_new)} new")
 
     if not all_articles:
         logger.warning("Empty corpus after storage update.")
+        save_data(data, stats)   # Drops the purged segments
+        save_caches()
+        return
+
+    # 3. Score ALL articles (tokenization cached per article, BM25 on corpus stats,
+    #    dynamic normalization)
+    all_articles = score_articles(all_articles, [], backend=SCORING_BACKEND, stats=stats)
+
+    # Nothing new to store or show (quiet hour, or only duplicates came in):
+    # write nothing, so the workflow has nothing to commit or deploy
+    digest = corpus_digest(all_articles, RENDER_VERSION)
+    if digest == load_status().get("digest"):
+        logger.info("Scored corpus unchanged since the last run: skipping save and render")
+        save_caches()
         return
 
-    # 3. Score ALL articles (full corpus, dynamic normalization)
-    all_articles = score_articles(all_articles, [])
+    save_data(data, stats)
+    save_caches()
 
-    # 4. Get top N for display
-    top_articles = get_top_articles(all_articles, top_n=TOP_N)
+    # 4. Get top N for display (from the score index with the sqlite backend)
+    top_articles = top_stored_articles(all_articles, TOP_N)
     logger.info(f"Top {TOP_N}: {[a['title'][:50] for a in top_articles[:5]]}")
 
     # 5. Check alerts on new articles only
@@ -58,8 +82,9 @@ def run():
         alerts_sent = check_and_alert(truly_new)
         logger.info(f"Alerts triggered: {alerts_sent}")
 
-    # 6. Render HTML
+    # 6. Render HTML, then record the run (a failed render is retried next hour)
     generate(all_articles, top_articles)
+    save_status(digest)
 
     logger.info("=== Cycle complete ===")
 
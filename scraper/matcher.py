@@ -0,0 +1,90 @@
+"""
+matcher.py - Multi-phrase substring matcher (Aho-Corasick).
+
+Compiled once; count() then walks the text a single time whatever the
+number of phrases, instead of one str.count() scan per phrase.
+
+The automaton runs in Python, one dict lookup per character, so its cost
+per document is flat (about 500 us on a 6k-char page), while each
+str.count() is a C scan costing about 4 us per phrase. Measured on the
+bench_pages fixtures (median of 9 runs, 3 repeats), str.count() wins below
+about 120 phrases (380 against 500 us for the 92 current ones) and loses
+above (700 against 500 us at 160), so small phrase lists skip the
+automaton entirely.
+"""
+
+from collections import deque
+from typing import Iterable
+
+STR_COUNT_MAX_PHRASES = 120   # Up to this many phrases, count() uses str.count()
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over a fixed phrase list, compiled to a DFA.
+    Matching is plain substring matching, like `phrase in text`.
+    Small phrase lists are counted with str.count() instead (same result).
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases: list[str] = list(dict.fromkeys(p for p in phrases if p))
+        self._delta: list[dict[str, int]] = []
+        self._out: list[tuple] = []
+        if len(self.phrases) > STR_COUNT_MAX_PHRASES:
+            self._compile()
+
+    def _compile(self) -> None:
+        goto: list[dict[str, int]] = [{}]
+        out: list[list[int]] = [[]]
+
+        # 1. Trie
+        for pid, phrase in enumerate(self.phrases):
+            state = 0
+            for ch in phrase:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(pid)
+
+        # 2. Failure links (BFS), folded into a full transition table so
+        # matching never has to follow failure links at runtime.
+        fail = [0] * len(goto)
+        delta: list[dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            out[state] = out[state] + out[fail[state]]
+            delta[state] = dict(delta[fail[state]])
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0) if state else 0
+                delta[state][ch] = nxt
+                queue.append(nxt)
+
+        self._delta = delta
+        self._out = [tuple((pid, len(self.phrases[pid])) for pid in o) for o in out]
+
+    def count(self, text: str) -> dict[str, int]:
+        """
+        Non-overlapping occurrence count per phrase (same as text.count(phrase)),
+        for phrases that occur at least once.
+        """
+        if not self._delta:
+            return {p: n for p in self.phrases if (n := text.count(p))}
+
+        delta, out = self._delta, self._out
+        counts: dict[int, int] = {}
+        next_free: dict[int, int] = {}   # per phrase: first index a new match may start at
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                end = i + 1
+                for pid, length in out[state]:
+                    if end - length >= next_free.get(pid, 0):
+                        counts[pid] = counts.get(pid, 0) + 1
+                        next_free[pid] = end
+        return {self.phrases[pid]: n for pid, n in counts.items()}
@@ -0,0 +1,141 @@
+"""
+neardup.py - Near-duplicate detection (MinHash + banded LSH index).
+
+Wire-service rewrites of one story change a few words here and there,
+so exact link/title dedup misses them. Each article gets a MinHash
+signature of its word 2-shingles (title + content), computed once and
+stored on the article ("minhash"). Two articles are near-duplicates
+when their estimated Jaccard similarity (share of equal signature
+values) is at least SIMILARITY.
+
+Short texts (headline-only feed items) are left to the exact dedup: with
+under MIN_SHINGLES shingles, one changed word moves the Jaccard by 0.1 or
+more, so "Wall Street opens higher ..." and "... opens lower ..." would
+pass as rewrites of each other. They get an empty signature and never
+enter the index.
+
+Signatures use one-permutation hashing: every shingle is hashed once
+and lands in one of NUM_HASHES bins, each keeping its minimum; empty
+bins borrow from the next filled one. Values are truncated to 16 bits
+(4 hex digits), so a signature is a 256-character string.
+
+The index cuts signatures into BANDS bands of ROWS values; a lookup only
+compares against articles sharing a whole band, i.e. likely near-
+duplicates (J=0.5 -> 64% chance, J=0.8 -> >99%; J=0.2 -> 3%), instead of
+scanning the corpus. Like the BM25 corpus stats, it follows the corpus
+incrementally: articles are added as they enter it and removed as they
+leave retention.
+"""
+
+import hashlib
+from typing import Optional
+
+from scoring import tokenize
+
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+SIMILARITY = 0.5          # Estimated Jaccard above which an article is a rewrite
+SHINGLE_WORDS = 2
+MIN_SHINGLES = 20         # Fewer shingles: too few for a meaningful Jaccard
+
+_VALUE_HEX = 4            # 16-bit values
+_BAND_HEX = ROWS * _VALUE_HEX
+_BIN_BITS = NUM_HASHES.bit_length() - 1
+_EMPTY = 1 << 64
+
+
+def _shingles(title: str, content: str) -> set[bytes]:
+    words = tokenize(f"{title} {content}").words
+    if len(words) < SHINGLE_WORDS:
+        return set(words)
+    return {b" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def signature(title: str, content: str) -> str:
+    """MinHash signature (hex string), "" for a text under MIN_SHINGLES shingles."""
+    shingles = _shingles(title, content)
+    if len(shingles) < MIN_SHINGLES:
+        return ""
+    bins = [_EMPTY] * NUM_HASHES
+    for s in shingles:
+        h = int.from_bytes(hashlib.blake2b(s, digest_size=8).digest(), "little")
+        b = h & (NUM_HASHES - 1)
+        v = h >> _BIN_BITS
+        if v < bins[b]:
+            bins[b] = v
+
+    # Densification: an empty bin borrows the next filled bin's value,
+    # offset by the distance so that borrowed values stay distinct.
+    filled = list(bins)
+    for i in range(NUM_HASHES):
+        if filled[i] == _EMPTY:
+            j = 1
+            while filled[(i + j) % NUM_HASHES] == _EMPTY:
+                j += 1
+            bins[i] = filled[(i + j) % NUM_HASHES] + j * _EMPTY
+    # Keep 16 well-mixed bits of each value
+    return "".join(f"{(v * 0x9E3779B97F4A7C15 >> 40) & 0xFFFF:04x}" for v in bins)
+
+
+def similarity(a: str, b: str) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    if not a or not b:
+        return 0.0
+    equal = sum(a[i:i + _VALUE_HEX] == b[i:i + _VALUE_HEX] for i in range(0, len(a), _VALUE_HEX))
+    return equal / NUM_HASHES
+
+
+def article_signature(article: dict) -> str:
+    """The article's MinHash signature, computed on first use and cached on it."""
+    sig = article.get("minhash")
+    if sig is None:
+        sig = signature(article.get("title", ""), article.get("content", ""))
+        article["minhash"] = sig
+    return sig
+
+
+class NearDupIndex:
+    """Banded MinHash (LSH) index over the stored corpus."""
+
+    def __init__(self, articles: Optional[list[dict]] = None):
+        self._bands: list[dict[str, list[dict]]] = [{} for _ in range(BANDS)]
+        for article in articles or []:
+            self.add(article)
+
+    def add(self, article: dict) -> None:
+        sig = article_signature(article)
+        if not sig:
+            return
+        for band, table in enumerate(self._bands):
+            table.setdefault(sig[band * _BAND_HEX:(band + 1) * _BAND_HEX], []).append(article)
+
+    def remove(self, article: dict) -> None:
+        """Drop an indexed article (matched by identity) from its buckets."""
+        sig = article.get("minhash")
+        if not sig:
+            return
+        for band, table in enumerate(self._bands):
+            key = sig[band * _BAND_HEX:(band + 1) * _BAND_HEX]
+            bucket = [a for a in table.get(key, ()) if a is not article]
+            if bucket:
+                table[key] = bucket
+            else:
+                table.pop(key, None)
+
+    def find(self, article: dict) -> Optional[dict]:
+        """Most similar stored article with similarity >= SIMILARITY, if any."""
+        sig = article_signature(article)
+        if not sig:
+            return None
+        best, best_similarity = None, SIMILARITY
+        checked = set()
+        for band, table in enumerate(self._bands):
+            for other in table.get(sig[band * _BAND_HEX:(band + 1) * _BAND_HEX], ()):
+                if id(other) in checked:
+                    continue
+                checked.add(id(other))
+                s = similarity(sig, other["minhash"])
+                if s >= best_similarity:
+                    best, best_similarity = other, s
+        return best
@@ -0,0 +1,58 @@
+"""
+net.py - Shared HTTP session.
+
+Every network call in the package (feeds, article pages, alert webhooks)
+goes through get_session(), so repeated requests to the same host reuse
+keep-alive connections and share one retry/backoff policy.
+"""
+
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = "Mozilla/5.0 (compatible; MacroLabBot/1.0; +https://github.com/yourusername/macro-lab)"
+
+POOL_CONNECTIONS = 16   # Distinct hosts whose connection pools are kept alive
+POOL_MAXSIZE = 4        # Keep-alive connections per host (>= sources.PER_HOST_CONCURRENCY)
+
+# Idempotent requests only: a retried POST could send the same alert twice.
+RETRY_POLICY = Retry(
+    total=3,
+    connect=2,
+    read=2,
+    status=2,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({"GET", "HEAD"}),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+_session: Optional[requests.Session] = None
+_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=RETRY_POLICY,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Process-wide pooled session, created on first use. Safe to share across threads."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
@@ -1,24 +1,61 @@
 """
 renderer.py - Generates index.html from scored articles.
 
+index.html is a small shell (dashboard, charts, filters, the top cards
+inline); the 7-day history is not inlined but written as one gzipped JSON
+shard of rendered cards per day in cards/, fetched by the page on demand
+and shown PAGE_SIZE cards at a time. Page size and first paint do not
+grow with the corpus. The update time is fetched from status.json, so
+an unchanged corpus renders byte-identical files.
+
+Search and theme filters do not scan cards: cards/index.json.gz maps
+tokens to card IDs and themes to ID bitsets (see _build_index), so a
+filter is a few lookups and only the shards of the cards shown are
+fetched. A query of plain words matches cards holding a word that
+starts with each of them (words of 2+ characters; title + first 600
+characters of content). Any other query ("S&P 500", one-letter words,
+a "quoted phrase") is matched as a phrase: a case-insensitive substring
+of the card's title + preview, checked on the cards the index leaves.
+
 Features:
-  - Toggle Top20 / Full 7-day history
+  - Toggle Top20 / Full 7-day history (paginated, newest day first)
   - Date filter (dropdown per day)
   - Multi-theme filter (combinable, OR logic)
-  - Keyword search bar
+  - Keyword search bar (prefix match on every word, precomputed index;
+    phrase / substring match for queries with punctuation or one-letter words)
   - Score gradient + tooltip with matched keywords
   - Visual alert pulse for critical articles
   - Mini dashboard: articles/day bar chart + theme donut (Chart.js CDN)
   - Compact / detailed mode toggle
 """
 
+import base64
+import gzip
+import hashlib
 import json
+import logging
+import re
 from collections import defaultdict
+from contextlib import ExitStack
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
+from typing import Iterable, Iterator
+
+from cache import card_cache
+from dates import article_ts, ts_day
+from storage import STATUS_FILE
+
+logger = logging.getLogger(__name__)
 
 OUTPUT_FILE = Path(__file__).parent.parent / "index.html"
+CARDS_DIR = Path(__file__).parent.parent / "cards"
 TOP_N = 20
+PAGE_SIZE = 50   # History cards rendered per page
+INDEX_FILE = "index.json.gz"      # Search index, next to the day shards
+TOKEN_RE = re.compile(r"\w\w+")    # Indexed / searched tokens: 2+ word characters
+RENDER_VERSION = 2   # Bump when the markup changes (invalidates card_cache and the corpus digest)
+GZIP_LEVEL = 6       # gzip's own default is 9: much slower for a few percent
+WRITE_BUFFER = 1 << 16   # Bytes gathered before each write to the outputs
 
 THEME_LABELS = {
     "war_conflict":        "⚔️ War/Conflict",
@@ -48,25 +85,9 @@ def _score_color(score: float) -> str:
         return "#8b949e"
 
 
-def _parse_pub_day(date_str: str) -> str:
-    """Return YYYY-MM-DD or empty string."""
-    if not date_str:
-        return ""
-    # Try email/RFC date (Mon, 01 Jan 2024 12:00:00 +0000)
-    try:
-        from email.utils import parsedate_to_datetime
-        dt = parsedate_to_datetime(date_str)
-        return dt.strftime("%Y-%m-%d")
-    except Exception:
-        pass
-    # ISO formats
-    for fmt in ("%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
-        try:
-            dt = datetime.strptime(date_str[:len(fmt)], fmt)
-            return dt.strftime("%Y-%m-%d")
-        except Exception:
-            continue
-    return date_str[:10] if len(date_str) >= 10 else ""
+def _pub_day(article: dict) -> str:
+    """Return YYYY-MM-DD (UTC) from the article's parsed published_ts."""
+    return ts_day(article_ts(article))
 
 
 def _build_chart_data(all_articles: list) -> tuple:
@@ -76,7 +97,7 @@ def _build_chart_data(all_articles: list) -> tuple:
     per_theme = defaultdict(int)
 
     for a in all_articles:
-        d = _parse_pub_day(a.get("published_date", ""))
+        d = _pub_day(a)
         if d in per_day:
             per_day[d] += 1
         for t in a.get("themes", []):
@@ -85,20 +106,20 @@ def _build_chart_data(all_articles: list) -> tuple:
     return per_day, dict(per_theme)
 
 
-def _build_card(article: dict) -> str:
+def _card_fragment(article: dict) -> list[str]:
+    """
+    The parts of a card that do not move with the corpus, as static HTML
+    segments. The score-dependent values (_card_scores) go between them, so
+    a card is rendered once and only re-assembled when IDF moves its score.
+    """
     raw_title = article.get("title", "No title")
     title = raw_title.replace('"', "&quot;").replace("<", "&lt;").replace(">", "&gt;")
     link = article.get("link", "#")
     source = article.get("source", "Unknown")
     pub_raw = article.get("published_date", "")
-    pub_day = _parse_pub_day(pub_raw)
-    score = article.get("score_normalized", 0.0)
+    pub_day = _pub_day(article)
     themes = article.get("themes", [])
     keywords = article.get("matched_keywords", [])
-    threshold = article.get("alert_threshold", 75.0)
-    is_alert = (score >= threshold) or len(themes) > 0
-
-    color = _score_color(score)
 
     theme_html = "".join(
         f'<span class="theme-tag">{THEME_LABELS.get(t, t)}</span>'
@@ -111,27 +132,31 @@ def _build_card(article: dict) -> str:
         preview += "&#8230;"
 
     kw_display = ", ".join(keywords[:8]) if keywords else "—"
-    tooltip = f"Score: {score:.2f} | Seuil: {threshold:.1f} | Sentiment: {article.get('sentiment_label','?')}| Mots-cles: {kw_display}"
-
-    # data-text: searchable text blob (title + content snippet, lowercased)
-    searchable = (raw_title + " " + content[:600]).lower().replace('"', "").replace("\n", " ")
-
-    alert_cls = " card-alert" if is_alert else ""
-    alert_badge = '<span class="alert-badge">🚨 ALERT</span>' if is_alert else ""
     kw_hint = f'<span class="kw-hint">🔑 {", ".join(keywords[:5])}</span>' if keywords else ""
+    duplicates = article.get("duplicates", [])
+    also_in = ", ".join(d.get("source", "") for d in duplicates).replace('"', "&quot;")
+    dup_badge = (
+        f'<span class="source-badge" title="Also reported by: {also_in}">+{len(duplicates)}</span>'
+        if duplicates else ""
+    )
 
-    return (
-        f'<article class="card{alert_cls}" '
-        f'data-score="{score:.2f}" data-date="{pub_day}" '
-        f'data-themes="{",".join(themes)}" data-text="{searchable[:800]}">\n'
+    return [
+        '<article class="card',
+        '" data-score="',
+        f'" data-date="{pub_day}" '
+        f'data-themes="{",".join(themes)}">\n'
         f'  <div class="card-header">\n'
-        f'    <span class="source-badge">{source}</span>\n'
+        f'    <span class="source-badge">{source}</span>{dup_badge}\n'
         f'    <span class="score-pill" '
-        f'style="background:color-mix(in srgb,{color} 18%,transparent);'
-        f'color:{color};border-color:color-mix(in srgb,{color} 35%,transparent)" '
-        f'title="{tooltip}">{score:.1f} <sup>ℹ</sup></span>\n'
+        f'style="background:color-mix(in srgb,',
+        ' 18%,transparent);color:',
+        ';border-color:color-mix(in srgb,',
+        ' 35%,transparent)" title="',
+        f" | Sentiment: {article.get('sentiment_label','?')}| Mots-cles: {kw_display}\">",
+        f' <sup>ℹ</sup></span>\n'
         f'    {theme_html}\n'
-        f'    {alert_badge}\n'
+        f'    ',
+        f'\n'
         f'  </div>\n'
         f'  <h3 class="card-title"><a href="{link}" target="_blank" rel="noopener">{title}</a></h3>\n'
         f'  <p class="preview card-detail">{preview}</p>\n'
@@ -139,12 +164,255 @@ def _build_card(article: dict) -> str:
         f'    <time datetime="{pub_day}">{pub_raw[:25] if pub_raw else "Unknown date"}</time>\n'
         f'    {kw_hint}\n'
         f'  </div>\n'
-        f'</article>'
+        f'</article>',
+    ]
+
+
+def _card_scores(article: dict) -> list[str]:
+    """The score-dependent values of a card, one per gap between fragment segments."""
+    score = article.get("score_normalized", 0.0)
+    threshold = article.get("alert_threshold", 75.0)
+    is_alert = (score >= threshold) or len(article.get("themes", [])) > 0
+    color = _score_color(score)
+    return [
+        " card-alert" if is_alert else "",
+        f"{score:.2f}",
+        color, color, color,
+        f"Score: {score:.2f} | Seuil: {threshold:.1f}",
+        f"{score:.1f}",
+        '<span class="alert-badge">🚨 ALERT</span>' if is_alert else "",
+    ]
+
+
+def _assemble_card(fragment: list[str], scores: list[str]) -> str:
+    parts = [fragment[0]]
+    for value, segment in zip(scores, fragment[1:]):
+        parts.append(value)
+        parts.append(segment)
+    return "".join(parts)
+
+
+def _card_id(article: dict) -> str:
+    return article.get("link") or article.get("title", "")
+
+
+def _card_key(article: dict) -> str:
+    """
+    Hash of everything _card_fragment reads: no score, threshold or alert
+    flag, which move with IDF every run (see _card_scores). The text is
+    covered by score_key, the title + content hash scoring already keeps.
+    """
+    content = article.get("content", "")[:301] if not article.get("score_key") else ""
+    parts = (
+        RENDER_VERSION, article.get("title", ""), article.get("link", ""),
+        article.get("source", ""), article.get("published_date", ""), _pub_day(article),
+        article.get("score_key", ""), content,
+        ",".join(article.get("themes", [])), ",".join(article.get("matched_keywords", [])[:8]),
+        article.get("sentiment_label", "?"),
+        ",".join(d.get("source", "") for d in article.get("duplicates", [])),
     )
+    return hashlib.blake2b("\0".join(map(str, parts)).encode("utf-8"), digest_size=10).hexdigest()
+
 
+def _card_digest(keys: list[str]) -> str:
+    return hashlib.blake2b("".join(keys).encode("ascii"), digest_size=10).hexdigest()
 
-def render_html(all_articles: list, top_articles: list) -> str:
-    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+
+def _cached_card(article: dict, key: str, scores: list[str]) -> tuple[str, bool]:
+    """
+    (card HTML, whether its fragment had to be rendered): the fragment comes
+    from card_cache when the key matches, and the scores are filled in.
+    """
+    card_id = _card_id(article)
+    entry = card_cache.get(card_id)
+    if entry is not None and entry["key"] == key:
+        return _assemble_card(entry["fragment"], scores), False
+    fragment = _card_fragment(article)
+    card_cache.set(card_id, {"key": key, "fragment": fragment, "ts": article_ts(article)})
+    return _assemble_card(fragment, scores), True
+
+
+def _searchable(article: dict) -> str:
+    """Search text of a card: title + content snippet, lowercased."""
+    text = article.get("title", "") + " " + article.get("content", "")[:600]
+    return text.lower()
+
+
+def _group_by_day(all_articles: list) -> list[tuple[str, list]]:
+    """
+    [(day, articles by decreasing score)], newest day first. This is the
+    history order; an article's page ID is its position in it.
+    """
+    per_day = defaultdict(list)
+    for a in all_articles:
+        per_day[_pub_day(a)].append(a)
+    return [
+        (day, sorted(per_day[day], key=lambda x: x.get("score_normalized", 0), reverse=True))
+        for day in sorted(per_day, reverse=True)
+    ]
+
+
+def _to_json(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _json_array(items: Iterable) -> Iterator[str]:
+    """A JSON array, one item at a time."""
+    yield "["
+    for n, item in enumerate(items):
+        yield ("," if n else "") + _to_json(item)
+    yield "]"
+
+
+def _write_stream(
+    path: Path, chunks: Iterable[str], formats: tuple[str, ...] = ("",), gzip_name: str = "",
+) -> dict:
+    """
+    Stream text chunks, encoded once, to `path` + every suffix of `formats`
+    in a single pass: "" plain, ".gz" gzip. Gzip files have no timestamp,
+    so the same text gives the same bytes. `gzip_name` goes in the gzip header's
+    name field (see _gzip_name). Each file replaces the previous one
+    atomically once complete. Returns {suffix: bytes written}.
+    """
+    targets = {f: path.with_name(path.name + f) for f in formats}
+    tmp_paths = {f: t.with_name(t.name + ".tmp") for f, t in targets.items()}
+
+    with ExitStack() as stack:
+        files = {f: stack.enter_context(open(tmp, "wb")) for f, tmp in tmp_paths.items()}
+        writers = []
+        if "" in files:
+            writers.append(files[""].write)
+        if ".gz" in files:
+            gz = stack.enter_context(gzip.GzipFile(
+                filename=gzip_name, mode="wb", fileobj=files[".gz"], compresslevel=GZIP_LEVEL, mtime=0
+            ))
+            writers.append(gz.write)
+
+        buffer, size = [], 0
+        for chunk in chunks:
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= WRITE_BUFFER:
+                data = "".join(buffer).encode("utf-8")
+                for write in writers:
+                    write(data)
+                buffer, size = [], 0
+        data = "".join(buffer).encode("utf-8")
+        for write in writers:
+            write(data)
+
+    for f, tmp in tmp_paths.items():
+        tmp.replace(targets[f])
+    return {f: t.stat().st_size for f, t in targets.items()}
+
+
+def _gzip_name(path: Path) -> str:
+    """Name field of a gzip file's header, "" when absent or the file is missing."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(64)
+    except OSError:
+        return ""
+    # Magic + deflate, FNAME set and no FEXTRA before it: the name starts at byte 10
+    if head[:3] != b"\x1f\x8b\x08" or len(head) < 10 or not head[3] & 0x08 or head[3] & 0x04:
+        return ""
+    end = head.find(b"\0", 10)
+    return head[10:end].decode("latin-1") if end != -1 else ""
+
+
+def _build_index(days: list[tuple[str, list]]) -> dict:
+    """
+    Search index over the history, by page ID:
+      - tokens : token -> sorted IDs of the cards containing it, delta-encoded
+      - themes : theme -> bitset of IDs (base64, bit i = byte i>>3, mask 1<<(i&7))
+    Days need no index: their cards are a contiguous ID range (SHARDS).
+    The page tokenizes queries with the same rule (TOKEN_RE).
+    """
+    postings = defaultdict(list)
+    theme_ids = defaultdict(list)
+    n = 0
+    for _, articles in days:
+        for a in articles:
+            for token in set(TOKEN_RE.findall(_searchable(a))):
+                postings[token].append(n)
+            for theme in a.get("themes", []):
+                theme_ids[theme].append(n)
+            n += 1
+
+    tokens = {}
+    for token in sorted(postings):
+        ids = postings[token]
+        tokens[token] = [ids[0]] + [b - a for a, b in zip(ids, ids[1:])]
+    themes = {}
+    for theme, ids in theme_ids.items():
+        bits = bytearray((n + 7) // 8)
+        for i in ids:
+            bits[i >> 3] |= 1 << (i & 7)
+        themes[theme] = base64.b64encode(bits).decode("ascii")
+    return {"n": n, "tokens": tokens, "themes": themes}
+
+
+def _write_cards(days: list[tuple[str, list]]) -> list[dict]:
+    """
+    Write one cards/YYYY-MM-DD.json.gz per day (its rendered cards, in page
+    ID order) and the search index, and delete shards of expired days.
+    Returns the shard list the page loads from.
+
+    Incremental: a card fragment is re-rendered only when its _card_key
+    changed; scores are filled in at assembly. Each file carries the digest
+    of what it was built from in its gzip header, and is rebuilt only when
+    the file on disk does not carry the current one, whatever .cache says.
+    """
+    CARDS_DIR.mkdir(exist_ok=True)
+    shards = []
+    digests = []
+    start = rendered = 0
+    for day, articles in days:
+        path = CARDS_DIR / f"{day}.json.gz"
+        keys = [_card_key(a) for a in articles]
+        scores = [_card_scores(a) for a in articles]
+        h = hashlib.blake2b(digest_size=10)
+        for key, values in zip(keys, scores):
+            h.update(f"{key}|{'|'.join(values)}\n".encode("utf-8"))
+        digest = h.hexdigest()
+        if _gzip_name(path) != digest:
+            def cards(articles=articles, keys=keys, scores=scores):
+                nonlocal rendered
+                for article, key, values in zip(articles, keys, scores):
+                    html, fresh = _cached_card(article, key, values)
+                    rendered += fresh
+                    yield html
+            _write_stream(path.with_suffix(""), _json_array(cards()), formats=(".gz",), gzip_name=digest)
+        shards.append({"day": day, "file": f"{CARDS_DIR.name}/{path.name}",
+                       "start": start, "count": len(articles)})
+        digests.append(_card_digest(keys))
+        start += len(articles)
+
+    # Same searchable cards in the same order -> same index
+    path = CARDS_DIR / INDEX_FILE
+    digest = _card_digest(digests)
+    if _gzip_name(path) != digest:
+        index = _build_index(days)
+        _write_stream(path.with_suffix(""), json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+                      .iterencode(index), formats=(".gz",), gzip_name=digest)
+
+    current = {f"{day}.json.gz" for day, _ in days} | {INDEX_FILE}
+    for path in CARDS_DIR.glob("*.json.gz"):
+        if path.name not in current:
+            path.unlink()
+    logger.info(f"Rendered {rendered} of {start} card fragments (others reused from the fragment cache)")
+    return shards
+
+
+def render_html(all_articles: list, top_articles: list, shards: list[dict], top_ids: list[int]) -> str:
+    """The whole page as one string (generate() streams render_chunks instead)."""
+    return "".join(render_chunks(all_articles, top_articles, shards, top_ids))
+
+
+def render_chunks(
+    all_articles: list, top_articles: list, shards: list[dict], top_ids: list[int]
+) -> Iterator[str]:
+    """The page, section by section and top card by top card."""
     threshold_val = top_articles[0].get("alert_threshold", 75.0) if top_articles else 75.0
     threshold_display = f"{threshold_val:.1f}" if isinstance(threshold_val, float) else str(threshold_val)
 
@@ -169,10 +437,7 @@ def render_html(all_articles: list, top_articles: list) -> str:
         for i in range(7)
     )
 
-    top_cards = "\n".join(_build_card(a) for a in top_articles)
-    all_cards = "\n".join(_build_card(a) for a in sorted(
-        all_articles, key=lambda x: x.get("score_normalized", 0), reverse=True
-    ))
+    shards_json = _to_json(shards)
 
     theme_filter_btns = "\n".join(
         f'<button class="filter-btn" data-theme="{k}" onclick="toggleTheme(this)">'
@@ -187,6 +452,14 @@ let currentView = 'top';
 let activeThemes = new Set();
 let isCompact = false;
 
+const TOP = JSON.parse(document.getElementById('top-data').textContent);
+const shardData = {};
+const TOP_HTML = new Map(TOP.map(rec => [rec.i, rec.h]));
+const cardTexts = new Map();
+let searchIndex = null;
+let listing = null;
+let filterRun = 0;
+
 function setView(v) {
   currentView = v;
   document.getElementById('view-top').classList.toggle('active', v === 'top');
@@ -224,37 +497,204 @@ function clearThemes() {
   applyFilters();
 }
 
-function applyFilters() {
-  const query   = document.getElementById('searchInput').value.toLowerCase().trim();
-  const dateVal = document.getElementById('dateSelect').value;
-  const cid     = currentView === 'top' ? 'cards-top' : 'cards-all';
-  const cards   = document.getElementById(cid).querySelectorAll('.card');
+// Shards and index are gzipped JSON; decompress here unless the server already did.
+function fetchJson(file) {
+  return fetch(file)
+    .then(r => { if (!r.ok) throw new Error(file + ': ' + r.status); return r.arrayBuffer(); })
+    .then(buf => {
+      const b = new Uint8Array(buf);
+      if (b[0] === 0x1f && b[1] === 0x8b) {
+        return new Response(new Blob([buf]).stream().pipeThrough(new DecompressionStream('gzip'))).json();
+      }
+      return JSON.parse(new TextDecoder().decode(buf));
+    });
+}
 
-  let visible = 0;
-  cards.forEach(card => {
-    const text   = (card.dataset.text || '') + ' ' + (card.querySelector('.card-title')?.textContent || '').toLowerCase();
-    const date   = card.dataset.date  || '';
-    const themes = card.dataset.themes || '';
+function loadShard(shard) {
+  if (!shardData[shard.day]) {
+    shardData[shard.day] = fetchJson(shard.file).catch(e => { delete shardData[shard.day]; throw e; });
+  }
+  return shardData[shard.day];
+}
 
-    const matchSearch = !query    || text.includes(query);
-    const matchDate   = !dateVal  || date === dateVal;
-    const matchTheme  = activeThemes.size === 0 || [...activeThemes].some(t => themes.includes(t));
+// Search index, fetched the first time a search or theme filter is used
+function loadIndex() {
+  if (!searchIndex) {
+    searchIndex = fetchJson(INDEX_FILE).then(raw => {
+      const themes = {};
+      for (const [t, b64] of Object.entries(raw.themes)) themes[t] = Uint8Array.from(atob(b64), c => c.charCodeAt(0));
+      return { n: raw.n, postings: raw.tokens, vocab: Object.keys(raw.tokens).sort(), themes };
+    }).catch(e => { searchIndex = null; throw e; });
+  }
+  return searchIndex;
+}
 
-    const show = matchSearch && matchDate && matchTheme;
-    card.classList.toggle('hidden', !show);
-    if (show) visible++;
-  });
+function tokenize(text) {
+  return (text.toLowerCase().match(/[\\p{L}\\p{N}_]+/gu) || []).filter(t => t.length >= 2);
+}
 
+// Plain words are matched as prefixes through the index. Anything else
+// (punctuation as in "S&P 500", one-letter words, a "quoted phrase") is a
+// phrase: a substring of the card's title + preview. Its words that follow a
+// separator start a word of the card text, so they still narrow the
+// candidates down through the index before the substring check.
+function parseQuery(value) {
+  const q = value.trim().toLowerCase().replace(/\\s+/g, ' ');
+  const words = [...q.matchAll(/[\\p{L}\\p{N}_]+/gu)];
+  if (/^[\\p{L}\\p{N}_ ]*$/u.test(q) && words.every(m => m[0].length >= 2)) {
+    return { terms: words.map(m => m[0]), phrase: '' };
+  }
+  const phrase = q.replace(/^"(.*)"$/, '$1').trim();
+  const terms = [...phrase.matchAll(/[\\p{L}\\p{N}_]+/gu)]
+    .filter(m => m.index > 0 && m[0].length >= 2).map(m => m[0]);
+  return { terms, phrase };
+}
+
+// Title + preview of a rendered card (see _card_fragment), lowercased, entities decoded
+const ENTITIES = { '&amp;': '&', '&lt;': '<', '&gt;': '>', '&quot;': '"', '&#8230;': '\\u2026' };
+function cardText(id, html) {
+  let text = cardTexts.get(id);
+  if (text === undefined) {
+    const m = html.match(/<h3 class="card-title"><a [^>]*>([\\s\\S]*?)<\\/a><\\/h3>\\s*<p class="preview card-detail">([\\s\\S]*?)<\\/p>/);
+    text = m ? (m[1] + ' ' + m[2]).replace(/&(amp|lt|gt|quot|#8230);/g, e => ENTITIES[e])
+      .toLowerCase().replace(/\\s+/g, ' ') : '';
+    cardTexts.set(id, text);
+  }
+  return text;
+}
+
+// Candidates whose card text contains `phrase` (top cards inline, others from their shard)
+async function phraseMatches(ids, phrase) {
+  const out = [];
+  for (const id of ids) {
+    let html = TOP_HTML.get(id);
+    if (html === undefined) {
+      const shard = SHARDS.find(s => id < s.start + s.count);
+      html = (await loadShard(shard))[id - shard.start];
+    }
+    if (cardText(id, html).includes(phrase)) out.push(id);
+  }
+  return out;
+}
+
+// Cards holding a token that starts with `prefix` (binary search in the sorted vocabulary)
+function prefixMask(idx, prefix) {
+  const mask = new Uint8Array(idx.n);
+  let lo = 0, hi = idx.vocab.length;
+  while (lo < hi) { const mid = (lo + hi) >> 1; if (idx.vocab[mid] < prefix) lo = mid + 1; else hi = mid; }
+  for (let k = lo; k < idx.vocab.length && idx.vocab[k].startsWith(prefix); k++) {
+    let id = 0;
+    for (const delta of idx.postings[idx.vocab[k]]) { id += delta; mask[id] = 1; }
+  }
+  return mask;
+}
+
+function currentFilters() {
+  const query = parseQuery(document.getElementById('searchInput').value);
+  return {
+    terms:  query.terms,
+    phrase: query.phrase,
+    day:    document.getElementById('dateSelect').value,
+    themes: [...activeThemes],
+  };
+}
+
+// IDs of the matching cards, in history order: every term (as a prefix) AND any
+// active theme, then the phrase, if any. `only`: restrict to these IDs (top view).
+async function matchingIds(f, only) {
+  let lo = 0, hi = TOTAL;
+  if (f.day) {
+    const shard = SHARDS.find(s => s.day === f.day);
+    if (!shard) return [];
+    lo = shard.start; hi = shard.start + shard.count;
+  }
+  let masks = [], bits = [];
+  if (f.terms.length || f.themes.length) {
+    const idx = await loadIndex();
+    masks = f.terms.map(t => prefixMask(idx, t));
+    bits = f.themes.map(t => idx.themes[t]).filter(Boolean);
+    if (f.themes.length && !bits.length) return [];
+  }
+  const ids = [];
+  for (let i = lo; i < hi; i++) {
+    if (only && !only.has(i)) continue;
+    if (masks.some(m => !m[i])) continue;
+    if (bits.length && !bits.some(b => b[i >> 3] & (1 << (i & 7)))) continue;
+    ids.push(i);
+  }
+  return f.phrase ? phraseMatches(ids, f.phrase) : ids;
+}
+
+function showCount(n) {
   const rc = document.getElementById('resultCount');
-  if (rc) rc.textContent = visible + ' article' + (visible !== 1 ? 's' : '') + ' affiché' + (visible !== 1 ? 's' : '');
+  if (rc) rc.textContent = n + ' article' + (n !== 1 ? 's' : '') + ' affiché' + (n !== 1 ? 's' : '');
+}
+
+async function applyFilters() {
+  const run = ++filterRun;
+  const view = currentView;
+  let ids;
+  try {
+    ids = await matchingIds(currentFilters(), view === 'top' ? TOP_HTML : null);
+  } catch (e) {
+    console.error(e);
+    return;
+  }
+  if (run !== filterRun) return;   // superseded by a later keystroke / click
+  if (view === 'top') {
+    const keep = new Set(ids);
+    const html = TOP.filter(rec => keep.has(rec.i)).map(rec => rec.h);
+    document.getElementById('cards-top').innerHTML = html.join('\\n');
+    showCount(html.length);
+    return;
+  }
+  listing = { ids, shown: 0, busy: false };
+  document.getElementById('cards-all').innerHTML = '';
+  document.getElementById('moreBtn').classList.add('hidden');
+  showCount(ids.length);
+  loadMore();
+}
+
+// Next PAGE_SIZE cards of the listing, fetching only the day shards they sit in
+async function loadMore() {
+  const l = listing;
+  if (!l || l.busy || l.shown >= l.ids.length) return;
+  l.busy = true;
+  const page = l.ids.slice(l.shown, l.shown + PAGE_SIZE);
+  const html = [];
+  try {
+    for (const id of page) {
+      const shard = SHARDS.find(s => id < s.start + s.count);
+      html.push((await loadShard(shard))[id - shard.start]);
+    }
+  } catch (e) {
+    console.error(e);
+    return;
+  } finally {
+    l.busy = false;
+  }
+  if (l !== listing) return;   // filters changed while fetching
+  document.getElementById('cards-all').insertAdjacentHTML('beforeend', html.join('\\n'));
+  l.shown += page.length;
+  document.getElementById('moreBtn').classList.toggle('hidden', l.shown >= l.ids.length);
 }
 
+// Next page as soon as the "more" button scrolls into view
+new IntersectionObserver(entries => {
+  if (currentView === 'all' && entries.some(e => e.isIntersecting)) loadMore();
+}, { rootMargin: '400px' }).observe(document.getElementById('moreBtn'));
+
 // ── CHARTS ──
 const gridColor = '#30363d';
 const tickColor = '#8b949e';
 const axisOpts  = { grid: { color: gridColor }, ticks: { color: tickColor, font: { size: 10 } } };
 
 """ + f"""
+const SHARDS = {shards_json};
+const TOTAL = SHARDS.reduce((n, s) => n + s.count, 0);
+const PAGE_SIZE = {PAGE_SIZE};
+const INDEX_FILE = '{CARDS_DIR.name}/{INDEX_FILE}';
+const STATUS_FILE = '{STATUS_FILE.name}';
 new Chart(document.getElementById('chartDays'), {{
   type: 'bar',
   data: {{
@@ -298,15 +738,22 @@ if (themeValues.length > 0 && themeValues.some(v => v > 0)) {{
     '<p style="color:#8b949e;font-size:12px;text-align:center;margin-top:30px">Aucun thème critique détecté</p>';
 }}
 
+// The update time is read from status.json: it alone never changes this page
+fetchJson(STATUS_FILE).then(status => {{
+  const updated = status.last_updated.slice(0, 16).replace('T', ' ') + ' UTC';
+  document.getElementById('updated').textContent = updated;
+  document.title = 'Macro Lab — ' + updated;
+}}).catch(e => console.error(e));
+
 applyFilters();
 """
 
-    return f"""<!DOCTYPE html>
+    yield f"""<!DOCTYPE html>
 <html lang="en">
 <head>
   <meta charset="UTF-8">
   <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <title>Macro Lab — {now}</title>
+  <title>Macro Lab</title>
   <script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js"></script>
   <style>
     :root {{
@@ -364,16 +811,19 @@ applyFilters();
     .compact-mode .card{{padding:9px 14px;margin-bottom:6px}}
     .hidden{{display:none!important}}
     .view{{display:none}}.view.active{{display:block}}
+    .more-btn{{display:block;margin:4px auto 20px}}
   </style>
 </head>
-<body>
+"""
+
+    yield f"""<body>
 
 <header>
   <h1>📊 Macro Lab</h1>
   <button class="btn on" id="viewBtn" onclick="setView('top')">Top {TOP_N}</button>
   <button class="btn" id="viewAllBtn" onclick="setView('all')">Historique 7j</button>
   <button class="btn" id="compactBtn" onclick="toggleCompact()">⊞ Compact</button>
-  <div class="header-meta">Mis à jour: {now}<br>Seuil alerte: {threshold_display} · {alert_count} alertes</div>
+  <div class="header-meta">Mis à jour: <span id="updated">—</span><br>Seuil alerte: {threshold_display} · {alert_count} alertes</div>
 </header>
 
 <main>
@@ -416,15 +866,26 @@ applyFilters();
 
   <div class="view active" id="view-top">
     <div class="section-title">Top {TOP_N} articles — cette heure</div>
-    <div id="cards-top">{top_cards}</div>
+    <div id="cards-top"></div>
   </div>
 
   <div class="view" id="view-all">
     <div class="section-title">Historique complet — 7 derniers jours ({len(all_articles)} articles)</div>
-    <div id="cards-all">{all_cards}</div>
+    <div id="cards-all"></div>
+    <button class="btn more-btn hidden" id="moreBtn" onclick="loadMore()">Plus d'articles</button>
   </div>
 </main>
 
+<script id="top-data" type="application/json">"""
+
+    # </ would end the <script> element the JSON sits in
+    top_cards = (
+        {"i": i, "h": _cached_card(a, _card_key(a), _card_scores(a))[0]} for i, a in zip(top_ids, top_articles)
+    )
+    for chunk in _json_array(top_cards):
+        yield chunk.replace("</", "<\\/")
+
+    yield f"""</script>
 <script>
 {js_block}
 </script>
@@ -433,7 +894,18 @@ applyFilters();
 
 
 def generate(all_articles: list, top_articles: list) -> None:
-    html = render_html(all_articles, top_articles)
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        f.write(html)
-    print(f"Generated {OUTPUT_FILE} ({len(html):,} bytes, {len(all_articles)} articles)")
\ No newline at end of file
+    days = _group_by_day(all_articles)
+    page_ids = {id(a): i for i, a in enumerate(a for _, articles in days for a in articles)}
+    shards = _write_cards(days)
+    sizes = _write_stream(OUTPUT_FILE, render_chunks(
+        all_articles, top_articles, shards, [page_ids[id(a)] for a in top_articles]
+    ))
+    # Forget fragments of articles that left the 7-day window
+    if all_articles:
+        oldest = min(article_ts(a) for a in all_articles)
+        card_cache.prune(lambda entry: entry["ts"] < oldest)
+    card_cache.save()
+
+    shard_bytes = sum((CARDS_DIR / Path(s["file"]).name).stat().st_size for s in shards)
+    print(f"Generated {OUTPUT_FILE} ({sizes['']:,} bytes) + {len(shards)} card shards "
+          f"({shard_bytes:,} bytes, {len(all_articles)} articles)")
@@ -10,11 +10,14 @@ Pipeline :
   6. Seuil adaptatif mean + 1.5σ
 """
 
+import hashlib
+import json
 import math
-import re
 import logging
 from collections import Counter
-from typing import Optional
+from typing import NamedTuple, Optional
+
+from matcher import PhraseMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -183,43 +186,147 @@ CRITICAL_THEMES: dict[str, list[str]] = {
 
 BM25_K1 = 1.5
 BM25_B  = 0.75
-AVG_DOC_LENGTH = 500
+AVG_DOC_LENGTH = 500   # Repli quand le corpus est vide (sinon longueur moyenne réelle)
+THEME_BONUS = 5.0
+
+
+def _scoring_version() -> str:
+    """Empreinte des dictionnaires : change => tout le corpus est re-tokenisé."""
+    params = [SENTIMENT_DICT, KEYWORD_WEIGHTS, CRITICAL_THEMES]
+    blob = json.dumps(params, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(blob, digest_size=6).hexdigest()
+
+
+SCORING_VERSION = _scoring_version()
+
+# Matcher unique (mots-clés BM25 + thèmes). À la taille actuelle de la
+# taxonomie il compte par str.count() ; l'automate ne prend le relais que si
+# la liste dépasse matcher.STR_COUNT_MAX_PHRASES.
+_PHRASE_MATCHER = PhraseMatcher(
+    list(KEYWORD_WEIGHTS) + [kw for kws in CRITICAL_THEMES.values() for kw in kws]
+)
+_KEYWORD_ORDER = {phrase: i for i, phrase in enumerate(KEYWORD_WEIGHTS)}
+_PHRASE_THEMES: dict[str, list[str]] = {}
+for theme_name, theme_keywords in CRITICAL_THEMES.items():
+    for kw in theme_keywords:
+        _PHRASE_THEMES.setdefault(kw, []).append(theme_name)
+_THEME_ORDER = {theme: i for i, theme in enumerate(CRITICAL_THEMES)}
 
 
 # =============================================================================
 # 3. FONCTIONS INTERNES
 # =============================================================================
 
-def _preprocess(text: str) -> str:
-    text = re.sub(r'[\r\n]+', ' ', text)
-    text = text.lower()
-    text = re.sub(r'[^a-z0-9\s]', ' ', text)
-    return re.sub(r'\s+', ' ', text).strip()
+TITLE_WEIGHT = 3   # Le titre compte 3x plus que le contenu
 
+# Tout octet hors [a-z0-9] devient un séparateur (les caractères non ASCII
+# sont encodés en "?" après lower(), donc séparateurs eux aussi).
+_WORD_BYTES = bytes(c if (97 <= c <= 122 or 48 <= c <= 57) else 32 for c in range(256))
 
-def _tokenize(text: str) -> list[str]:
-    """Unigrams + bigrams pour capturer les expressions multi-mots."""
-    words = text.split()
-    bigrams = [' '.join(words[i:i+2]) for i in range(len(words) - 1)]
-    return words + bigrams
+# Les tokens sont des bytes : on indexe le dictionnaire en bytes une fois pour toutes.
+_SENTIMENT_BYTES: dict[bytes, float] = {k.encode("utf-8"): v for k, v in SENTIMENT_DICT.items()}
 
 
-def _sentiment_score(title: str, content: str) -> tuple[float, str]:
+def _words(text: str) -> list[bytes]:
+    """Mots alphanumériques en minuscules (ponctuation et retours ligne = séparateurs)."""
+    return text.lower().encode("ascii", "replace").translate(_WORD_BYTES).split()
+
+
+class Tokens(NamedTuple):
+    """Texte tokenisé : mots dans l'ordre et ensemble des mots distincts."""
+    words: list[bytes]
+    vocab: frozenset[bytes]
+
+
+def tokenize(text: str) -> Tokens:
     """
-    Score de sentiment financier avec sqrt transformation.
-    Title pèse 3x plus que le contenu.
-    Retourne (raw_score, label).
+    Tokenisation publique (mêmes mots que l'analyse de sentiment : minuscules,
+    tout caractère hors [a-z0-9] est un séparateur). Mots et ensemble sont
+    construits une seule fois par texte.
     """
-    # Titre 3x plus lourd
-    combined = _preprocess((title + " ") * 3 + " " + content)
-    tokens = _tokenize(combined)
-    token_counts = Counter(tokens)
+    words = _words(text)
+    return Tokens(words, frozenset(words))
+
+
+def _build_bigram_heads() -> dict[bytes, dict[bytes, bytes]]:
+    """premier mot -> {second mot -> expression} pour les entrées à deux mots."""
+    heads: dict[bytes, dict[bytes, bytes]] = {}
+    for phrase in _SENTIMENT_BYTES:
+        parts = phrase.split(b" ")
+        if len(parts) == 2 and all(p and p == p.translate(_WORD_BYTES) for p in parts):
+            heads.setdefault(parts[0], {})[parts[1]] = phrase
+    return heads
+
+
+_BIGRAM_HEADS = _build_bigram_heads()
+
+
+def _count_hits(tokens: Tokens, weight: int, unigrams: dict, bigrams: dict) -> None:
+    """
+    Accumule les occurrences pondérées des entrées de SENTIMENT_DICT.
+    Le filtrage des unigrammes se fait en C (filter + Counter) ; aucun bigramme
+    n'est construit : on ne regarde le mot suivant que si le mot courant
+    commence une expression connue (ensemble des mots construit à la tokenisation).
+    """
+    words = tokens.words
+    for w, count in Counter(filter(_SENTIMENT_BYTES.__contains__, words)).items():
+        unigrams[w] = unigrams.get(w, 0) + count * weight
+
+    heads = _BIGRAM_HEADS.keys() & tokens.vocab
+    if not heads:
+        return
+    # Positions des mots de tête via list.index (scan en C), puis tri par
+    # position pour garder l'ordre de première apparition.
+    hits = []
+    last = len(words) - 1
+    for head in heads:
+        nexts = _BIGRAM_HEADS[head]
+        i = words.index(head)
+        while True:
+            if i < last:
+                phrase = nexts.get(words[i + 1])
+                if phrase is not None:
+                    hits.append((i, phrase))
+            try:
+                i = words.index(head, i + 1)
+            except ValueError:
+                break
+    for _, phrase in sorted(hits):
+        bigrams[phrase] = bigrams.get(phrase, 0) + weight
+
+
+def _add_bigram(first: bytes, second: bytes, weight: int, bigrams: dict) -> None:
+    phrase = _BIGRAM_HEADS.get(first, {}).get(second)
+    if phrase is not None:
+        bigrams[phrase] = bigrams.get(phrase, 0) + weight
 
-    raw = 0.0
-    for token, count in token_counts.items():
-        if token in SENTIMENT_DICT:
-            raw += SENTIMENT_DICT[token] * count
 
+def _sentiment_hits(title: str, content: str) -> tuple[dict[bytes, int], dict[bytes, int]]:
+    """
+    Occurrences pondérées (unigrammes, bigrammes) des entrées de SENTIMENT_DICT.
+    Title pèse 3x plus que le contenu (multiplicateur, sans dupliquer le texte).
+    """
+    title_tokens = tokenize(title)
+    content_tokens = tokenize(content)
+    title_words = title_tokens.words
+    content_words = content_tokens.words
+
+    # Ordre d'insertion = ordre de première apparition dans le texte
+    # "titre titre titre contenu" : sommes identiques à l'ancienne version.
+    unigrams: dict[bytes, int] = {}
+    bigrams: dict[bytes, int] = {}
+    _count_hits(title_tokens, TITLE_WEIGHT, unigrams, bigrams)
+    if title_words:
+        # Bigrammes aux jonctions titre|titre et titre|contenu
+        _add_bigram(title_words[-1], title_words[0], TITLE_WEIGHT - 1, bigrams)
+        if content_words:
+            _add_bigram(title_words[-1], content_words[0], 1, bigrams)
+    _count_hits(content_tokens, 1, unigrams, bigrams)
+    return unigrams, bigrams
+
+
+def _sentiment_transform(raw: float) -> tuple[float, str]:
+    """Signed sqrt + label à partir du score brut."""
     # Signed sqrt pour compresser les extrêmes
     if raw > 0:
         transformed = math.sqrt(raw)
@@ -242,36 +349,119 @@ def _sentiment_score(title: str, content: str) -> tuple[float, str]:
     return transformed, label
 
 
-def _relevance_score(title: str, content: str) -> tuple[float, list[str], list[str]]:
+def _sentiment_score(title: str, content: str) -> tuple[float, str]:
+    """
+    Score de sentiment financier avec sqrt transformation.
+    Retourne (raw_score, label).
+    """
+    unigrams, bigrams = _sentiment_hits(title, content)
+    raw = 0.0
+    for token, count in unigrams.items():
+        raw += _SENTIMENT_BYTES[token] * count
+    for token, count in bigrams.items():
+        raw += _SENTIMENT_BYTES[token] * count
+    return _sentiment_transform(raw)
+
+
+def _relevance_hits(title: str, content: str) -> tuple[dict[str, int], list[str], int]:
     """
-    Score de relevance macro via BM25 + détection thèmes critiques.
-    Retourne (score, themes, matched_keywords).
+    Un seul passage de l'automate sur le texte.
+    Retourne ({mot-clé: occurrences} dans l'ordre de la taxonomie, thèmes, longueur du doc).
     """
     combined = (title.lower() + " ") * 3 + content.lower()
     doc_len = len(combined.split())
+    counts = _PHRASE_MATCHER.count(combined)
 
+    keywords = sorted(
+        (p for p in counts if p in KEYWORD_WEIGHTS), key=_KEYWORD_ORDER.__getitem__
+    )
+    themes = sorted(
+        {t for p in counts for t in _PHRASE_THEMES.get(p, ())}, key=_THEME_ORDER.__getitem__
+    )
+    return {p: counts[p] for p in keywords}, themes, doc_len
+
+
+def _relevance_score(
+    keyword_counts: dict[str, int], themes: list[str], doc_len: int, stats: "CorpusStats"
+) -> float:
+    """
+    Score de relevance macro via BM25 (IDF et longueur moyenne du corpus)
+    + bonus par thème critique. O(mots-clés trouvés) : aucun re-scan du texte.
+    """
+    avgdl = stats.avgdl
+    # Même ordre de sommation que la taxonomie (identique au backend numpy)
     score = 0.0
-    matched_keywords = []
-    matched_themes = []
-
-    for phrase, weight in KEYWORD_WEIGHTS.items():
-        count = combined.count(phrase)
-        if count > 0:
-            tf_norm = (count * (BM25_K1 + 1)) / (
-                count + BM25_K1 * (1 - BM25_B + BM25_B * doc_len / AVG_DOC_LENGTH)
-            )
-            score += tf_norm * weight
-            matched_keywords.append(phrase)
-
-    for theme_name, keywords in CRITICAL_THEMES.items():
-        for kw in keywords:
-            if kw in combined:
-                if theme_name not in matched_themes:
-                    matched_themes.append(theme_name)
-                score += 5.0
-                break
+    for phrase, count in keyword_counts.items():
+        tf_norm = (count * (BM25_K1 + 1)) / (
+            count + BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avgdl)
+        )
+        score += tf_norm * KEYWORD_WEIGHTS[phrase] * stats.idf(phrase)
+
+    for _ in themes:
+        score += THEME_BONUS
+
+    return score
+
+
+# =============================================================================
+# 3b. STATISTIQUES DU CORPUS (BM25)
+# =============================================================================
+
+class CorpusStats:
+    """
+    Statistiques BM25 de la fenêtre glissante : nombre de documents, longueur
+    totale, fréquence documentaire par mot-clé. Maintenues incrémentalement
+    (add/remove) quand les articles entrent ou sortent du corpus, à partir des
+    champs doc_len / keyword_counts mis en cache sur chaque article : O(1) par
+    article, jamais de re-scan du corpus.
+    """
 
-    return score, matched_themes, matched_keywords[:15]
+    def __init__(self, n_docs: int = 0, total_len: int = 0, df: Optional[dict[str, int]] = None):
+        self.n_docs = n_docs
+        self.total_len = total_len
+        self.df: dict[str, int] = dict(df or {})
+
+    @property
+    def avgdl(self) -> float:
+        return self.total_len / self.n_docs if self.n_docs else float(AVG_DOC_LENGTH)
+
+    def idf(self, phrase: str) -> float:
+        """IDF BM25 (variante Lucene, toujours positive)."""
+        df = self.df.get(phrase, 0)
+        return math.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+
+    def add(self, article: dict) -> None:
+        analyze_article(article)
+        self.n_docs += 1
+        self.total_len += article["doc_len"]
+        for phrase in article["keyword_counts"]:
+            self.df[phrase] = self.df.get(phrase, 0) + 1
+
+    def remove(self, article: dict) -> None:
+        if "keyword_counts" not in article:
+            return  # jamais compté
+        self.n_docs -= 1
+        self.total_len -= article["doc_len"]
+        for phrase in article["keyword_counts"]:
+            left = self.df.get(phrase, 0) - 1
+            if left > 0:
+                self.df[phrase] = left
+            else:
+                self.df.pop(phrase, None)
+
+    @classmethod
+    def from_articles(cls, articles: list[dict]) -> "CorpusStats":
+        stats = cls()
+        for article in articles:
+            stats.add(article)
+        return stats
+
+    def to_dict(self) -> dict:
+        return {"n_docs": self.n_docs, "total_len": self.total_len, "df": self.df}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "CorpusStats":
+        return cls(d.get("n_docs", 0), d.get("total_len", 0), d.get("df"))
 
 
 # =============================================================================
@@ -318,9 +508,116 @@ def compute_dynamic_threshold(articles: list[dict]) -> float:
 # 5. INTERFACE PUBLIQUE (inchangée pour les autres fichiers)
 # =============================================================================
 
-def score_articles(articles: list[dict], existing_corpus: list[dict]) -> list[dict]:
+def _score_key(title: str, content: str) -> str:
+    """Clé de cache des scores bruts : version des dictionnaires + hash du texte."""
+    digest = hashlib.blake2b(digest_size=10)
+    digest.update(title.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(content.encode("utf-8"))
+    return f"{SCORING_VERSION}:{digest.hexdigest()}"
+
+
+def _set_analysis(
+    article: dict, sent_score: float, sent_label: str,
+    keyword_counts: dict[str, int], themes: list[str], doc_len: int, key: str,
+) -> None:
+    """Écrit le résultat de la tokenisation sur l'article (commun aux backends)."""
+    article["score_sentiment"] = round(sent_score, 4)
+    article["sentiment_label"] = sent_label
+    article["keyword_counts"]  = keyword_counts
+    article["themes"]          = themes
+    article["doc_len"]         = doc_len
+    article["score_key"]       = key
+
+
+def _needs_analysis(article: dict) -> Optional[str]:
+    """Retourne la nouvelle score_key si l'article doit être re-tokenisé, sinon None."""
+    key = _score_key(article.get("title", ""), article.get("content", ""))
+    if article.get("score_key") == key and "keyword_counts" in article:
+        return None
+    return key
+
+
+def analyze_article(article: dict) -> bool:
+    """
+    Tokenise l'article si son texte (ou les dictionnaires) a changé depuis
+    la dernière analyse. Retourne True si une analyse a eu lieu.
+    """
+    key = _needs_analysis(article)
+    if key is None:
+        return False
+    title   = article.get("title", "")
+    content = article.get("content", "")
+    sent_score, sent_label = _sentiment_score(title, content)
+    keyword_counts, themes, doc_len = _relevance_hits(title, content)
+    _set_analysis(article, sent_score, sent_label, keyword_counts, themes, doc_len, key)
+    return True
+
+
+PARALLEL_MIN_ARTICLES = 2000   # En dessous, démarrer des processus coûte plus cher
+
+
+def _analyze_texts(texts: list[tuple[str, str]]) -> list[tuple]:
+    """
+    Tokenise un lot de (titre, contenu) ; exécuté dans un processus worker.
+    Ne reçoit et ne renvoie que des types simples pour limiter le pickling.
+    """
+    results = []
+    for title, content in texts:
+        sent_score, sent_label = _sentiment_score(title, content)
+        keyword_counts, themes, doc_len = _relevance_hits(title, content)
+        results.append((sent_score, sent_label, keyword_counts, themes, doc_len))
+    return results
+
+
+def _analyze_parallel(stale: list[tuple[dict, str]], workers: int) -> None:
+    """
+    Tokenisation des articles `stale` répartie sur `workers` processus, par
+    morceaux ; les résultats sont fusionnés dans l'ordre, identiques au mode série.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    texts = [(a.get("title", ""), a.get("content", "")) for a, _ in stale]
+    size = max(1, math.ceil(len(texts) / (workers * 4)))
+    chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = [r for chunk in pool.map(_analyze_texts, chunks) for r in chunk]
+
+    for (article, key), (sent_score, sent_label, keyword_counts, themes, doc_len) in zip(stale, results):
+        _set_analysis(article, sent_score, sent_label, keyword_counts, themes, doc_len, key)
+
+
+def _set_scores(article: dict, rel_score: float) -> None:
+    """Scores dérivés de la relevance du run (commun aux backends)."""
+    article["score_relevance"]  = round(rel_score, 4)
+    article["matched_keywords"] = list(article["keyword_counts"])[:15]
+
+    # Score combiné : on prend la valeur absolue du sentiment
+    # (un article très négatif est aussi pertinent qu'un très positif)
+    # et on ajoute la relevance. Pondération 40% sentiment / 60% relevance.
+    article["score_combined"] = round(
+        0.4 * abs(article["score_sentiment"]) + 0.6 * rel_score, 4
+    )
+    # Conserver score brut pour compatibilité
+    article["score"] = article["score_combined"]
+
+
+def score_articles(
+    articles: list[dict], existing_corpus: list[dict], backend: str = "python",
+    stats: Optional[CorpusStats] = None, workers: int = 1,
+) -> list[dict]:
     """
     Pipeline complet sur le corpus.
+    La tokenisation est mise en cache sur l'article (score_key) : seuls les
+    articles nouveaux ou modifiés, ou tout le corpus après un changement de
+    dictionnaire, sont re-tokenisés. La relevance BM25 est recalculée à
+    chaque run depuis les comptes en cache et `stats` (IDF, longueur moyenne) ;
+    sans `stats`, elles sont calculées sur `articles`.
+    backend="numpy" : moteur vectorisé de scoring_batch (numpy requis),
+    résultats identiques.
+    workers > 1 : la tokenisation (gros backfills) est répartie sur autant de
+    processus ; normalisation et seuil restent globaux, résultats identiques.
     Produit sur chaque article :
       - score_sentiment   : score signé (négatif/positif)
       - sentiment_label   : "Positive" / "Negative" / "Neutral" / "Extreme ..."
@@ -330,42 +627,60 @@ def score_articles(articles: list[dict], existing_corpus: list[dict]) -> list[di
       - themes            : liste de thèmes critiques détectés
       - matched_keywords  : mots-clés BM25 détectés (pour tooltip)
       - alert_threshold   : seuil dynamique du run
-      - is_relevant       : bool
+      - is_relevant       : score ≥ seuil ou thème critique (règle des alertes)
+      - score_key, keyword_counts, doc_len : cache de tokenisation
     """
+    if backend == "numpy":
+        import scoring_batch
+
+    stale = []
     for article in articles:
-        title   = article.get("title", "")
-        content = article.get("content", "")
+        key = _needs_analysis(article)
+        if key is not None:
+            stale.append((article, key))
+
+    logger.info(f"Scoring: {len(stale)} articles re-tokenized, {len(articles) - len(stale)} from cache")
+
+    # Un article re-tokenisé sort des stats avec ses anciens comptes
+    # et y revient avec les nouveaux.
+    if stats is not None:
+        for article, _ in stale:
+            stats.remove(article)
+
+    if workers > 1 and len(stale) >= PARALLEL_MIN_ARTICLES:
+        _analyze_parallel(stale, workers)
+    elif backend == "numpy":
+        scoring_batch.analyze(stale)
+    else:
+        for article, _ in stale:
+            analyze_article(article)
 
-        # Sentiment
-        sent_score, sent_label = _sentiment_score(title, content)
-        article["score_sentiment"]  = round(sent_score, 4)
-        article["sentiment_label"]  = sent_label
-
-        # Relevance BM25
-        rel_score, themes, keywords = _relevance_score(title, content)
-        article["score_relevance"]  = round(rel_score, 4)
-        article["themes"]           = themes
-        article["matched_keywords"] = keywords
-
-        # Score combiné : on prend la valeur absolue du sentiment
-        # (un article très négatif est aussi pertinent qu'un très positif)
-        # et on ajoute la relevance. Pondération 40% sentiment / 60% relevance.
-        article["score_combined"] = round(
-            0.4 * abs(sent_score) + 0.6 * rel_score, 4
-        )
-        # Conserver score brut pour compatibilité
-        article["score"] = article["score_combined"]
+    if stats is None:
+        stats = CorpusStats.from_articles(articles)
+    else:
+        for article, _ in stale:
+            stats.add(article)
+
+    if backend == "numpy":
+        scoring_batch.score_relevance(articles, stats)
+        # Normalisation globale + seuil adaptatif
+        threshold = scoring_batch.normalize_and_threshold(articles)
+    else:
+        for article in articles:
+            rel_score = _relevance_score(
+                article["keyword_counts"], article["themes"], article["doc_len"], stats
+            )
+            _set_scores(article, rel_score)
 
-    # Normalisation globale
-    articles = normalize_scores(articles)
+        # Normalisation globale
+        articles = normalize_scores(articles)
 
-    # Seuil adaptatif
-    threshold = compute_dynamic_threshold(articles)
+        # Seuil adaptatif
+        threshold = compute_dynamic_threshold(articles)
 
     for article in articles:
-        article["score_normalized"] = article["score_combined"]
-        article["alert_threshold"] = 5.0 # seuil fixe temporaire
-        article["is_relevant"] = article["score_normalized"] >= 5.0
+        article["alert_threshold"] = threshold
+        article["is_relevant"] = article["score_normalized"] >= threshold or bool(article["themes"])
 
     return articles
 
@@ -0,0 +1,133 @@
+"""
+scoring_batch.py - Vectorized batch backend for scoring.score_articles.
+
+Optional: needs numpy (pip install numpy). Selected with
+score_articles(..., backend="numpy").
+
+Tokenization still runs per article (scoring._sentiment_hits and the
+phrase automaton), and only for articles whose cached analysis is stale.
+The hits of the batch then become sparse document-term matrices in COO
+form (doc, term, count). Sentiment, BM25 relevance (corpus IDF and
+average length from scoring.CorpusStats), percentile normalization and
+the mean + 1.5σ threshold are array operations over them.
+
+Results are identical to the pure-Python path, not just close:
+  - COO entries keep each document's summation order and np.bincount
+    accumulates them sequentially, like the Python `+=` loops;
+  - sequential sums for the threshold use np.cumsum, not pairwise np.sum;
+  - final rounding goes through Python's round(), as in scoring.py.
+"""
+
+import numpy as np
+
+import scoring
+from scoring import (
+    BM25_B, BM25_K1, KEYWORD_WEIGHTS, THEME_BONUS, CorpusStats,
+    _relevance_hits, _sentiment_hits, _sentiment_transform, _set_analysis, _set_scores,
+)
+
+_SENT_TERMS = list(scoring._SENTIMENT_BYTES)
+_SENT_INDEX = {term: i for i, term in enumerate(_SENT_TERMS)}
+_SENT_WEIGHTS = np.array([scoring._SENTIMENT_BYTES[t] for t in _SENT_TERMS], dtype=np.float64)
+
+_KW_TERMS = list(KEYWORD_WEIGHTS)
+_KW_INDEX = {term: i for i, term in enumerate(_KW_TERMS)}
+_KW_WEIGHTS = np.array([KEYWORD_WEIGHTS[t] for t in _KW_TERMS], dtype=np.float64)
+
+
+def _sentiment_raw(hits: list[tuple[dict, dict]]) -> np.ndarray:
+    """Raw sentiment per document = sentiment matrix · weights."""
+    docs, terms, counts = [], [], []
+    for d, (unigrams, bigrams) in enumerate(hits):
+        for table in (unigrams, bigrams):
+            for term, count in table.items():
+                docs.append(d)
+                terms.append(_SENT_INDEX[term])
+                counts.append(count)
+    docs_a = np.array(docs, dtype=np.int64)
+    contrib = _SENT_WEIGHTS[np.array(terms, dtype=np.int64)] * np.array(counts, dtype=np.int64)
+    return np.bincount(docs_a, weights=contrib, minlength=len(hits))
+
+
+def _relevance_raw(articles: list[dict], stats: CorpusStats) -> np.ndarray:
+    """BM25 relevance per document (IDF-weighted keyword matrix), theme bonuses included."""
+    docs, terms, counts, is_theme = [], [], [], []
+    doc_lens = np.array([a["doc_len"] for a in articles], dtype=np.int64)
+    for d, article in enumerate(articles):
+        for term, count in article["keyword_counts"].items():
+            docs.append(d)
+            terms.append(_KW_INDEX[term])
+            counts.append(count)
+            is_theme.append(False)
+        for _ in article["themes"]:
+            docs.append(d)
+            terms.append(0)
+            counts.append(0)
+            is_theme.append(True)
+
+    idf = np.array([stats.idf(t) for t in _KW_TERMS], dtype=np.float64)
+    docs_a = np.array(docs, dtype=np.int64)
+    terms_a = np.array(terms, dtype=np.int64)
+    tf = np.array(counts, dtype=np.int64)
+    dl = doc_lens[docs_a]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tf_norm = (tf * (BM25_K1 + 1)) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * dl / stats.avgdl))
+    contrib = np.where(
+        np.array(is_theme, dtype=bool),
+        THEME_BONUS,
+        tf_norm * _KW_WEIGHTS[terms_a] * idf[terms_a],
+    )
+    return np.bincount(docs_a, weights=contrib, minlength=len(articles))
+
+
+def analyze(stale: list[tuple[dict, str]]) -> None:
+    """Tokenize (article, score_key) pairs and store their cached analysis in one batch."""
+    if not stale:
+        return
+    sent_hits, rel_hits = [], []
+    for article, _ in stale:
+        title, content = article.get("title", ""), article.get("content", "")
+        sent_hits.append(_sentiment_hits(title, content))
+        rel_hits.append(_relevance_hits(title, content))
+
+    sentiment = _sentiment_raw(sent_hits).tolist()
+    for (article, key), raw, (keyword_counts, themes, doc_len) in zip(stale, sentiment, rel_hits):
+        sent_score, sent_label = _sentiment_transform(raw)
+        _set_analysis(article, sent_score, sent_label, keyword_counts, themes, doc_len, key)
+
+
+def score_relevance(articles: list[dict], stats: CorpusStats) -> None:
+    """Relevance + combined score for the whole corpus from the cached keyword counts."""
+    if not articles:
+        return
+    for article, rel_score in zip(articles, _relevance_raw(articles, stats).tolist()):
+        _set_scores(article, rel_score)
+
+
+def normalize_and_threshold(articles: list[dict]) -> float:
+    """
+    Vectorized normalize_scores + compute_dynamic_threshold.
+    Sets score_normalized on every article and returns the threshold.
+    """
+    if not articles:
+        return 75.0
+    vals = np.array([a.get("score_combined", 0.0) for a in articles], dtype=np.float64)
+    n = len(vals)
+
+    ordered = np.sort(vals)
+    p5 = ordered[max(int(0.05 * n), 0)]
+    p95 = max(ordered[min(int(0.95 * n), n - 1)], p5 + 0.001)
+    rng = p95 - p5
+
+    if rng > 0:
+        normalized = np.clip((vals - p5) / rng * 100, 0.0, 100.0)
+    else:
+        normalized = np.full(n, 50.0)
+    rounded = [round(v, 2) for v in normalized.tolist()]
+    for a, v in zip(articles, rounded):
+        a["score_normalized"] = v
+
+    scores = np.array(rounded, dtype=np.float64)
+    mean = np.cumsum(scores)[-1] / n
+    std = np.sqrt(np.cumsum((scores - mean) ** 2)[-1] / n)
+    return round(min(float(mean + 1.5 * std), 95.0), 2)
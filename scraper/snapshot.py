@@ -0,0 +1,180 @@
+"""
+snapshot.py - Compact binary snapshot of the stored corpus (hot load path).
+
+Optional: needs msgpack (pip install msgpack). Without it storage.py
+reads the JSON Lines segments, which stay the committed, human-readable
+copy of the corpus.
+
+The snapshot lives in .cache/ and is written by save_data() next to the
+segments. load_data() uses it only if its fingerprint (meta.json content
++ segment names and CRC-32s) still matches the store; otherwise it is
+ignored and rewritten on the next save.
+
+Layout is columnar: one list per article field instead of one map per
+article, so keys are stored once. Repeated strings (source, sentiment
+label, themes, keyword_counts phrases) go through a string table and
+are stored as small ints; on load every article shares the same
+interned string objects.
+
+Article text is not in the msgpack payload: it is concatenated into
+CONTENT_FILE and loaded articles only reference (offset, length) in a
+memory map of it (article.ContentStore), so content stays off-heap
+until a stage reads it.
+"""
+
+import logging
+import sys
+from typing import Iterable, Optional
+
+import msgpack
+
+from article import Article, ContentStore
+from cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = CACHE_DIR / "corpus.msgpack"
+CONTENT_FILE = CACHE_DIR / "corpus.content"
+FORMAT_VERSION = 2
+
+# Field -> how its strings are interned
+INTERNED_SCALARS = ("source", "sentiment_label")
+INTERNED_LISTS = ("themes",)
+INTERNED_KEYS = ("keyword_counts",)
+
+
+class _StringTable:
+    def __init__(self):
+        self.strings: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def id(self, s: str) -> int:
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+
+def _encode_column(field: str, values: list, table: _StringTable) -> list:
+    if field in INTERNED_SCALARS:
+        return [table.id(v) if isinstance(v, str) else v for v in values]
+    if field in INTERNED_LISTS:
+        return [[table.id(s) for s in v] for v in values]
+    if field in INTERNED_KEYS:
+        return [{table.id(k): n for k, n in v.items()} for v in values]
+    return values
+
+
+def _decode_column(field: str, values: list, strings: list[str]) -> list:
+    if field in INTERNED_SCALARS:
+        return [strings[v] if isinstance(v, int) else v for v in values]
+    if field in INTERNED_LISTS:
+        return [[strings[i] for i in v] for v in values]
+    if field in INTERNED_KEYS:
+        return [{strings[i]: n for i, n in v.items()} for v in values]
+    return values
+
+
+def _write_content(articles: list[Article]) -> tuple[list[list[int]], int]:
+    """Concatenate article texts into CONTENT_FILE. Returns ([offset, length] per article, size)."""
+    refs, offset = [], 0
+    tmp_path = CONTENT_FILE.with_suffix(".content.tmp")
+    with open(tmp_path, "wb") as f:
+        for article in articles:
+            raw = article.content_bytes()
+            f.write(raw)
+            refs.append([offset, len(raw)])
+            offset += len(raw)
+    # Articles of this run may still map the previous file: replacing it
+    # keeps their mapping valid (the old inode lives until unmapped).
+    tmp_path.replace(CONTENT_FILE)
+    return refs, offset
+
+
+def save(data: dict, fingerprint: str, exclude: Iterable[str] = ()) -> None:
+    """Write data (articles minus `exclude` fields, metadata, segments) as a snapshot."""
+    articles = [a if isinstance(a, Article) else Article(a) for a in data.get("articles", [])]
+    exclude = set(exclude) | {"content"}
+    fields = list(dict.fromkeys(k for a in articles for k in a if k not in exclude))
+    table = _StringTable()
+
+    # Dense column when every article has the field, {row: value} otherwise
+    columns, sparse = {}, {}
+    for field in fields:
+        if all(field in a for a in articles):
+            columns[field] = _encode_column(field, [a[field] for a in articles], table)
+        else:
+            rows = [i for i, a in enumerate(articles) if field in a]
+            values = _encode_column(field, [articles[i][field] for i in rows], table)
+            sparse[field] = dict(zip(rows, values))
+
+    SNAPSHOT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        content_refs, content_size = _write_content(articles)
+    except Exception as e:
+        logger.error(f"Failed to save snapshot content: {e}")
+        return
+
+    payload = {
+        "version": FORMAT_VERSION,
+        "fingerprint": fingerprint,
+        "count": len(articles),
+        "fields": fields,
+        "strings": table.strings,
+        "columns": columns,
+        "sparse": sparse,
+        "content": content_refs,
+        "content_size": content_size,
+        "metadata": data.get("metadata", {}),
+        "segments": data.get("segments", {}),
+    }
+    tmp_path = SNAPSHOT_FILE.with_suffix(".msgpack.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(msgpack.packb(payload, use_bin_type=True))
+        tmp_path.replace(SNAPSHOT_FILE)
+    except Exception as e:
+        logger.error(f"Failed to save snapshot: {e}")
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def load(fingerprint: str) -> Optional[dict]:
+    """The snapshot's data if it matches `fingerprint`, else None."""
+    if not SNAPSHOT_FILE.exists():
+        return None
+    try:
+        with open(SNAPSHOT_FILE, "rb") as f:
+            payload = msgpack.unpackb(f.read(), raw=False, strict_map_key=False)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable snapshot: {e}")
+        return None
+    if payload.get("version") != FORMAT_VERSION or payload.get("fingerprint") != fingerprint:
+        return None
+    if not CONTENT_FILE.exists() or CONTENT_FILE.stat().st_size != payload["content_size"]:
+        return None
+    store = ContentStore(CONTENT_FILE)
+
+    strings = [sys.intern(s) for s in payload["strings"]]
+    n = payload["count"]
+    columns = {f: _decode_column(f, v, strings) for f, v in payload["columns"].items()}
+    sparse = {f: dict(zip(v, _decode_column(f, list(v.values()), strings)))
+              for f, v in payload["sparse"].items()}
+
+    articles = [Article() for _ in range(n)]
+    for article, (offset, length) in zip(articles, payload["content"]):
+        article.set_content_ref(store, offset, length)
+    for field in payload["fields"]:
+        if field in columns:
+            for article, value in zip(articles, columns[field]):
+                article[field] = value
+        else:
+            for i, value in sparse[field].items():
+                articles[i][field] = value
+
+    return {
+        "articles": articles,
+        "metadata": payload["metadata"],
+        "segments": payload["segments"],
+    }
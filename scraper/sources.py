@@ -1,21 +1,45 @@
 """
 sources.py - Multi-source scraper returning standardized article dicts.
-Add new sources by implementing the BaseSource interface.
+Add new sources by subclassing BaseSource (see README).
 """
 
 import feedparser
-import requests
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timezone
+from functools import partial
+import io
+from urllib.parse import parse_qsl, urlencode, urlsplit
+import threading
 import time
 import logging
+from typing import Optional
+
+from article import Article
+from cache import content_cache, feed_cache
+from dates import parse_date, struct_to_ts
+from extract import extract_from_chunks
+from net import USER_AGENT, get_session
+from storage import RETENTION_DAYS, SeenIndex
 
 logger = logging.getLogger(__name__)
 
+MAX_WORKERS = 8             # Global cap on in-flight requests
+PER_HOST_CONCURRENCY = 2    # Simultaneous requests allowed against one domain
+PER_HOST_DELAY = 0.5        # Minimum seconds between two request starts on one domain
+MAX_PAGE_BYTES = 1_000_000  # Stop reading an article page after this many bytes
+CHUNK_SIZE = 64 * 1024
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+# Errors worth remembering for the whole retention window: the page is gone
+# (404/410) or walled off from scrapers (403). Anything else (408, 429, 5xx)
+# is retried on the next run.
+DEFINITIVE_ERRORS = (403, 404, 410)
+FEED_ACCEPT = "application/rss+xml, application/atom+xml, application/xml;q=0.9, text/xml;q=0.9, */*;q=0.1"
+
+FEED_TIMEOUT = 10
+
 HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (compatible; MacroLabBot/1.0; +https://github.com/yourusername/macro-lab)"
-    ),
+    "User-Agent": USER_AGENT,
     "Accept-Language": "en-US,en;q=0.9",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
 }
@@ -25,6 +49,7 @@ ARTICLE_SCHEMA = {
     "title": "",
     "link": "",
     "published_date": "",
+    "published_ts": None,      # UTC epoch, parsed once here (dates.py)
     "scrape_timestamp": "",
     "content": "",
     "score": 0.0,
@@ -33,103 +58,222 @@ ARTICLE_SCHEMA = {
 }
 
 
-def make_article(**kwargs) -> dict:
-    article = dict(ARTICLE_SCHEMA)
+def make_article(**kwargs) -> Article:
+    article = Article(ARTICLE_SCHEMA)
     article.update(kwargs)
-    article["scrape_timestamp"] = datetime.now(timezone.utc).isoformat()
+    now = datetime.now(timezone.utc)
+    article["scrape_timestamp"] = now.isoformat()
+    if article["published_ts"] is None:
+        dt = parse_date(article["published_date"])
+        article["published_ts"] = (dt or now).timestamp()
     return article
 
 
-def fetch_full_content(url: str, timeout: int = 10) -> str:
-    """Fetch and extract main text content from an article URL."""
-    try:
-        resp = requests.get(url, headers=HEADERS, timeout=timeout)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        # Remove boilerplate
-        for tag in soup(["script", "style", "nav", "header", "footer", "aside", "form"]):
-            tag.decompose()
-
-        # Try article body selectors in priority order
-        candidates = [
-            soup.find("article"),
-            soup.find(class_=lambda c: c and "article-body" in c.lower()),
-            soup.find(class_=lambda c: c and "story-body" in c.lower()),
-            soup.find(id=lambda i: i and "article" in i.lower()),
-            soup.find("main"),
-        ]
-
-        for candidate in candidates:
-            if candidate:
-                text = candidate.get_text(separator=" ", strip=True)
-                if len(text) > 200:
-                    return text[:8000]  # Cap at ~8k chars to keep RAM low
-
-        # Fallback: all paragraphs
-        paragraphs = soup.find_all("p")
-        text = " ".join(p.get_text(strip=True) for p in paragraphs)
-        return text[:8000]
+class HostLimiter:
+    """
+    Per-host politeness shared by all worker threads.
+    Bounds concurrent requests per domain and spaces out their start times,
+    so the global pool can stay wide without hammering a single site.
+    """
+
+    def __init__(self, concurrency: int = PER_HOST_CONCURRENCY, delay: float = PER_HOST_DELAY):
+        self.concurrency = concurrency
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: dict[str, float] = {}
+
+    @contextmanager
+    def slot(self, url: str):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            sem = self._slots.setdefault(host, threading.BoundedSemaphore(self.concurrency))
+        with sem:
+            # Reserve a start time under the lock, sleep outside of it
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + self.delay
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+_limiter = HostLimiter()
+
+
+# Query parameters that only track the click, never select the article
+TRACKING_PARAMS = frozenset((
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "ref", "ref_src", "cmpid", "ncid", "guccounter", "guce_referrer", "guce_referrer_sig",
+))
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name.startswith("utm_") or name in TRACKING_PARAMS
+
+
+def canonical_url(url: str) -> str:
+    """
+    Cache/dedup key for an article URL: lowercase scheme and host, no fragment
+    or trailing slash, tracking parameters (utm_*, fbclid, ...) dropped. Other
+    query parameters are kept, sorted: sites such as ?id= / ?p= / ?story=
+    identify the article by them.
+    """
+    parts = urlsplit(url.strip())
+    params = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(k)
+    )
+    query = f"?{urlencode(params)}" if params else ""
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}{parts.path.rstrip('/')}{query}"
 
+
+def _header_charset(content_type: str) -> Optional[str]:
+    """Charset parameter of a Content-Type header, if any."""
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "charset" and value:
+            return value.strip("\"' ")
+    return None
+
+
+def _capped_chunks(resp, max_bytes: int):
+    """Yield body chunks until max_bytes have been read; the rest is never downloaded."""
+    read = 0
+    for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+        remaining = max_bytes - read
+        if len(chunk) >= remaining:
+            yield chunk[:remaining]
+            return
+        read += len(chunk)
+        yield chunk
+
+
+def fetch_full_content(url: str, timeout: int = 10, max_bytes: int = MAX_PAGE_BYTES) -> str:
+    """
+    Fetch and extract main text content from an article URL.
+
+    The body is streamed straight into the incremental HTML parser and
+    reading stops after max_bytes, so memory per fetch is bounded whatever
+    the page size. Non-HTML responses are rejected from their headers alone.
+
+    Results are cached on disk by canonical URL, so a page is downloaded and
+    parsed at most once while it is inside the retention window. Definitive
+    HTTP errors (DEFINITIVE_ERRORS) are cached too, as an empty text; other
+    errors and network failures are not, since they are usually transient.
+    """
+    key = canonical_url(url)
+    cached = content_cache.get(key)
+    if cached is not None:
+        return cached["text"]
+
+    try:
+        with _limiter.slot(url), get_session().get(
+            url, headers=HEADERS, timeout=timeout, stream=True
+        ) as resp:
+            status = resp.status_code
+            if not resp.ok and status not in DEFINITIVE_ERRORS:
+                resp.raise_for_status()
+            content_type = resp.headers.get("Content-Type", "")
+            mime = content_type.split(";")[0].strip().lower()
+            if not resp.ok:
+                logger.warning(f"Failed to fetch content from {url}: HTTP {status}")
+                text = ""
+            elif mime and mime not in HTML_CONTENT_TYPES:
+                logger.warning(f"Skipping non-HTML content from {url}: {mime}")
+                text = ""
+            else:
+                text = extract_from_chunks(
+                    _capped_chunks(resp, max_bytes), encoding=_header_charset(content_type)
+                )
     except Exception as e:
         logger.warning(f"Failed to fetch content from {url}: {e}")
         return ""
 
+    content_cache.set(key, {"text": text, "status": status, "ts": time.time()})
+    return text
+
+
+class BaseSource:
+    """
+    RSS source. Subclasses set NAME and FEEDS; override parse_entry()
+    when a feed needs a different field mapping.
+    """
+    NAME = ""
+    FEEDS: list[str] = []
+    MAX_ENTRIES = 15
+
+    def parse_entry(self, entry) -> dict:
+        pub_date = entry.get("published", entry.get("updated", ""))
+        # feedparser already parsed the date: no string parsing needed
+        pub_parsed = entry.get("published_parsed") if "published" in entry else entry.get("updated_parsed")
+        return make_article(
+            source=self.NAME,
+            title=entry.get("title", "").strip(),
+            link=entry.get("link", ""),
+            published_date=pub_date,
+            published_ts=struct_to_ts(pub_parsed),
+            content=entry.get("summary", ""),
+        )
+
+    def fetch_feed(self, feed_url: str) -> list[dict]:
+        """
+        Fetch and parse a single feed. Safe to call from worker threads.
+        Sends the cached ETag / Last-Modified validators; a 304 yields no entries.
+        The download goes through the shared session; feedparser only parses.
+        """
+        try:
+            validators = feed_cache.get(feed_url) or {}
+            headers = dict(HEADERS, Accept=FEED_ACCEPT)
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("modified"):
+                headers["If-Modified-Since"] = validators["modified"]
+
+            with _limiter.slot(feed_url):
+                resp = get_session().get(feed_url, headers=headers, timeout=FEED_TIMEOUT)
+            if resp.status_code == 304:
+                logger.info(f"{self.NAME} feed {feed_url} not modified, skipped")
+                return []
+            resp.raise_for_status()
+
+            response_headers = {k.lower(): v for k, v in resp.headers.items()}
+            response_headers.setdefault("content-location", resp.url)
+            feed = feedparser.parse(io.BytesIO(resp.content), response_headers=response_headers)
+
+            etag, modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+            if etag or modified:
+                feed_cache.set(feed_url, {"etag": etag, "modified": modified})
+            return [self.parse_entry(entry) for entry in feed.entries[:self.MAX_ENTRIES]]
+        except Exception as e:
+            logger.error(f"{self.NAME} feed {feed_url} error: {e}")
+            return []
+
+    def fetch(self) -> list[dict]:
+        articles = []
+        for feed_url in self.FEEDS:
+            articles.extend(self.fetch_feed(feed_url))
+        return articles
+
 
-class FinancialTimeSource:
+class FinancialTimeSource(BaseSource):
     NAME = "Financial Times"
     FEEDS = [
         "https://www.ft.com/rss/home",
         "https://www.ft.com/rss/world",
         "https://www.ft.com/rss/markets-data",
     ]
-    def fetch(self) -> list[dict]:
-        articles = []
-        for feed_url in self.FEEDS:
-            try:
-                feed = feedparser.parse(feed_url)
-                for entry in feed.entries[:15]:
-                    pub_date = entry.get("published", entry.get("updated", ""))
-                    summary = entry.get("summary", "")
-                    articles.append(make_article(
-                        source=self.NAME,
-                        title=entry.get("title", "").strip(),
-                        link=entry.get("link", ""),
-                        published_date=pub_date,
-                        content=summary,
-                    ))
-                    time.sleep(0.2)
-            except Exception as e:
-                logger.error(f"Financial Times feed {feed_url} error: {e}")
-        return articles
 
 
-class YahooFinanceSource:
+class YahooFinanceSource(BaseSource):
     NAME = "Yahoo Finance"
     FEEDS = [
         "https://finance.yahoo.com/rss/topfinstories",
         "https://finance.yahoo.com/news/rssindex",
     ]
 
-    def fetch(self) -> list[dict]:
-        articles = []
-        for feed_url in self.FEEDS:
-            try:
-                feed = feedparser.parse(feed_url)
-                for entry in feed.entries[:15]:
-                    pub_date = entry.get("published", entry.get("updated", ""))
-                    summary = entry.get("summary", "")
-                    articles.append(make_article(
-                        source=self.NAME,
-                        title=entry.get("title", "").strip(),
-                        link=entry.get("link", ""),
-                        published_date=pub_date,
-                        content=summary,
-                    ))
-            except Exception as e:
-                logger.error(f"Yahoo Finance feed {feed_url} error: {e}")
-        return articles
-
 # Registry – add sources here as you expand
 ACTIVE_SOURCES = [
     YahooFinanceSource(),
@@ -147,28 +291,72 @@ def deduplicate_articles(articles: list[dict]) -> list[dict]:
     return unique_articles
 
 
-def fetch_all_articles(enrich_content: bool = True) -> list[dict]:
+def _source_jobs(source) -> list:
+    """Split a source into independent fetch jobs (one per feed when possible)."""
+    if isinstance(source, BaseSource):
+        return [partial(source.fetch_feed, feed_url) for feed_url in source.FEEDS]
+    return [source.fetch]
+
+
+def _run_job(job) -> list[dict]:
+    try:
+        return job()
+    except Exception as e:
+        logger.error(f"Fetch job {job} failed: {e}")
+        return []
+
+
+def fetch_all_articles(enrich_content: bool = True, seen: Optional[SeenIndex] = None) -> list[dict]:
     """
     Fetch articles from all active sources.
     If enrich_content=True, attempt to fetch full article text.
+    If `seen` is given (index of the stored corpus), entries already stored are
+    dropped before enrichment, so only genuinely new articles are returned.
+
+    Feeds and article pages are fetched concurrently on a bounded thread pool
+    (MAX_WORKERS); HostLimiter keeps each domain to PER_HOST_CONCURRENCY
+    requests spaced by PER_HOST_DELAY. Output order matches ACTIVE_SOURCES.
     """
-    all_articles = []
-    for source in ACTIVE_SOURCES:
-        try:
-            articles = source.fetch()
-            logger.info(f"Fetched {len(articles)} articles from {source.NAME}")
+    jobs = [(source, job) for source in ACTIVE_SOURCES for job in _source_jobs(source)]
 
-            if enrich_content:
-                for art in articles:
-                    if len(art["content"]) < 300 and art["link"]:
-                        full = fetch_full_content(art["link"])
-                        if full:
-                            art["content"] = full
-                        time.sleep(0.5)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        results = list(pool.map(_run_job, [job for _, job in jobs]))
 
+        per_source: dict[str, list[dict]] = {}
+        for (source, _), articles in zip(jobs, results):
+            per_source.setdefault(source.NAME, []).extend(articles)
+
+        all_articles = []
+        for name, articles in per_source.items():
+            logger.info(f"Fetched {len(articles)} articles from {name}")
             all_articles.extend(articles)
-        except Exception as e:
-            logger.error(f"Error in source {source.NAME}: {e}")
-    
-    all_articles = deduplicate_articles(all_articles)
+
+        all_articles = deduplicate_articles(all_articles)
+        if seen is not None:
+            fetched = len(all_articles)
+            all_articles = [a for a in all_articles if not seen.contains(a)]
+            logger.info(f"{fetched - len(all_articles)} already stored, {len(all_articles)} new")
+
+        if enrich_content:
+            to_enrich = [a for a in all_articles if len(a["content"]) < 300 and a["link"]]
+            contents = pool.map(fetch_full_content, [a["link"] for a in to_enrich])
+            for art, full in zip(to_enrich, contents):
+                if full:
+                    art["content"] = full
+            logger.info(f"Enriched {len(to_enrich)} articles with full-page content")
+
     return all_articles
+
+
+def save_caches() -> None:
+    """
+    Persist feed validators and the content cache. Call only once the fetched
+    articles are stored, otherwise a crash mid-run would turn their feeds
+    into 304s next hour.
+    """
+    cutoff = time.time() - RETENTION_DAYS * 86400
+    expired = content_cache.prune(lambda entry: entry.get("ts", 0) < cutoff)
+    if expired:
+        logger.info(f"Expired {expired} cached article contents")
+    feed_cache.save()
+    content_cache.save()
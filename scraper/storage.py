@@ -1,107 +1,347 @@
 """
 storage.py - Sliding window persistence.
 
-- Loads/saves data.json
-- Deduplicates by URL (within new batch AND against existing)
-- Purges articles older than 7 days
+- Append-only segmented store: data/YYYY-MM-DD.jsonl, one article per
+  line, by publication day (UTC), plus data/meta.json for run metadata
+  and corpus stats
+- A run appends its new articles to their day's segment; only segments
+  whose stored articles changed (re-tokenization) are rewritten
+- Deduplicates by URL (within new batch AND against existing), and
+  clusters near-duplicate rewrites into the stored story (neardup.py)
+- Purges whole day segments older than 7 days
 - Keeps repo size stable
+- Run timestamps live in status.json, with the digest of the last
+  persisted corpus (corpus_digest): a run that changes nothing writes
+  nothing, so the workflow has nothing to commit
+
+STORAGE_BACKEND=sqlite (environment) swaps the segment files for the
+indexed SQLite database of storage_sqlite.py, behind the same functions.
 """
 
+import hashlib
 import json
 import os
 import logging
+import zlib
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from typing import Optional
 
+from article import Article
+from dates import article_ts, ts_day
+from neardup import NearDupIndex
+from scoring import CorpusStats, get_top_articles
+
+try:
+    import snapshot
+except ImportError:   # msgpack not installed: always load from the segments
+    snapshot = None
+
 logger = logging.getLogger(__name__)
 
-DATA_FILE = Path(__file__).parent.parent / "data.json"
+DATA_DIR = Path(__file__).parent.parent / "data"
+META_FILE = DATA_DIR / "meta.json"
+LEGACY_DATA_FILE = Path(__file__).parent.parent / "data.json"   # migrated on first save
+STATUS_FILE = Path(__file__).parent.parent / "status.json"
 RETENTION_DAYS = 7
+BACKEND = os.environ.get("STORAGE_BACKEND", "segments")   # "segments" | "sqlite"
 
+# Recomputed by score_articles on every run (IDF moves with the corpus):
+# not stored, or every segment would change every hour.
+RUN_FIELDS = (
+    "score_relevance", "matched_keywords", "score_combined", "score",
+    "score_normalized", "alert_threshold", "is_relevant",
+)
 
-def _parse_date(date_str: str) -> Optional[datetime]:
-    """Try multiple date formats."""
-    if not date_str:
-        return None
-    formats = [
-        "%a, %d %b %Y %H:%M:%S %z",
-        "%a, %d %b %Y %H:%M:%S %Z",
-        "%Y-%m-%dT%H:%M:%S%z",
-        "%Y-%m-%dT%H:%M:%SZ",
-        "%Y-%m-%d %H:%M:%S",
-    ]
-    for fmt in formats:
-        try:
-            return datetime.strptime(date_str, fmt)
-        except (ValueError, TypeError):
-            continue
+
+def _article_day(article: dict) -> str:
+    """UTC day (YYYY-MM-DD) of the segment an article belongs to."""
+    return ts_day(article_ts(article))
+
+
+def _retention_cutoff() -> datetime:
+    """Start (UTC midnight) of the oldest day still kept."""
+    day = (datetime.now(timezone.utc) - timedelta(days=RETENTION_DAYS)).date()
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+def _segment_path(day: str) -> Path:
+    return DATA_DIR / f"{day}.jsonl"
+
+
+def _line_key(article: dict) -> str:
+    """Changes whenever an article's stored line does: re-tokenized, minhash added, duplicates clustered."""
+    return (
+        f"{article.get('score_key')}|{'minhash' in article:d}"
+        f"|{len(article.get('duplicates', ()))}"
+    )
+
+
+def _segment_line(article: dict) -> str:
+    stored = {k: v for k, v in article.items() if k not in RUN_FIELDS}
+    return json.dumps(stored, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
     try:
-        from email.utils import parsedate_to_datetime
-        return parsedate_to_datetime(date_str)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        tmp_path.replace(path)
     except Exception:
-        return None
-
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
 
-def load_data() -> dict:
-    """Load existing data.json or return empty structure."""
-    if DATA_FILE.exists():
-        try:
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            logger.info(f"Loaded {len(data.get('articles', []))} articles from storage")
-            return data
-        except Exception as e:
-            logger.error(f"Failed to load data.json: {e}")
 
+def _empty_data() -> dict:
     return {
         "articles": [],
-        "last_updated": "",
         "metadata": {
             "total_runs": 0,
             "sources": [],
             "retention_days": RETENTION_DAYS,
-        }
+        },
+        "segments": {},
     }
 
 
-def save_data(data: dict) -> None:
-    """Save data to data.json with atomic write."""
-    data["last_updated"] = datetime.now(timezone.utc).isoformat()
-    tmp_path = DATA_FILE.with_suffix(".tmp")
+def _load_segments() -> dict:
+    data = _empty_data()
+    if META_FILE.exists():
+        with open(META_FILE, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        meta.pop("last_updated", None)   # Moved to status.json
+        data["metadata"] = meta
+
+    for path in sorted(DATA_DIR.glob("*.jsonl")):
+        keys = []
+        with open(path, "r", encoding="utf-8") as f:
+            for n, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    article = Article(json.loads(line))
+                except json.JSONDecodeError:
+                    # Torn append from an interrupted run: the segment gets rewritten
+                    logger.warning(f"Skipping unreadable line {n} of {path.name}")
+                    keys.append(None)
+                    continue
+                data["articles"].append(article)
+                keys.append(_line_key(article))
+        data["segments"][path.stem] = keys
+    return data
+
+
+def _fingerprint() -> str:
+    """
+    Identifies the current segment store: meta.json content + every
+    segment's name and CRC-32. Checksummed, not stat()ed: a same-size edit
+    changes it, and a fresh checkout (new mtimes, same files) keeps it.
+    CRC-32 runs at several GB/s (about 10 ms for a 36 MB store, against
+    60 ms for blake2b), well below the load the snapshot saves.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    if META_FILE.exists():
+        h.update(META_FILE.read_bytes())
+    for path in sorted(DATA_DIR.glob("*.jsonl")):
+        h.update(f"{path.name}:{zlib.crc32(path.read_bytes()):08x};".encode())
+    return h.hexdigest()
+
+
+def corpus_digest(articles: list[dict], render_version: int = 0) -> str:
+    """
+    Digest of everything a run persists and renders: the stored articles
+    (_line_key), their dates, their scores at display precision, the UTC
+    day (the dashboard's 7-day window moves at midnight) and the renderer's
+    `render_version` (new markup must reach the page). When it matches the
+    last run's, there is nothing to save or render. Article lines are
+    hashed in sorted order: a snapshot load and a segment load of the same
+    corpus list articles differently but give the same digest.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{datetime.now(timezone.utc).date().isoformat()}|{render_version}".encode())
+    for line in sorted(
+        f"\n{a.get('link', '')}|{_line_key(a)}|{article_ts(a)}|{a.get('published_date', '')}"
+        f"|{a.get('score_normalized', 0.0):.2f}|{a.get('alert_threshold', 0.0):.1f}"
+        for a in articles
+    ):
+        h.update(line.encode("utf-8"))
+    return h.hexdigest()
+
+
+def load_status() -> dict:
+    """{"digest": corpus_digest of the last saved run, "last_updated": its ISO time}, or {}."""
     try:
-        with open(tmp_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        tmp_path.replace(DATA_FILE)
-        logger.info(f"Saved {len(data.get('articles', []))} articles to {DATA_FILE}")
+        with open(STATUS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
     except Exception as e:
-        logger.error(f"Failed to save data.json: {e}")
-        if tmp_path.exists():
-            tmp_path.unlink()
+        logger.warning(f"Ignoring unreadable {STATUS_FILE.name}: {e}")
+        return {}
+
+
+def save_status(digest: str) -> None:
+    status = {"digest": digest, "last_updated": datetime.now(timezone.utc).isoformat()}
+    _write_atomic(STATUS_FILE, json.dumps(status, indent=2))
+
+
+def load_data() -> dict:
+    """
+    Load the segmented store (or a legacy data.json) or return empty structure.
+    data["segments"] maps each loaded day to the _line_key() of its stored
+    lines, in order: save_data() uses it to append instead of rewriting.
+    The binary snapshot (snapshot.py) is used instead of parsing the
+    segments when it matches them.
+    """
+    try:
+        if BACKEND == "sqlite":
+            import storage_sqlite
+            data = storage_sqlite.load()
+            logger.info(f"Loaded {len(data['articles'])} articles from {storage_sqlite.DB_FILE}")
+            return data
+        if DATA_DIR.exists():
+            data = snapshot.load(_fingerprint()) if snapshot is not None else None
+            origin = "snapshot"
+            if data is None:
+                data = _load_segments()
+                origin = "segments"
+            logger.info(
+                f"Loaded {len(data['articles'])} articles in {len(data['segments'])} day segments "
+                f"(from {origin})"
+            )
+            return data
+        if LEGACY_DATA_FILE.exists():
+            with open(LEGACY_DATA_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            data["articles"] = [Article(a) for a in data.get("articles", [])]
+            data["segments"] = {}
+            logger.info(f"Loaded {len(data.get('articles', []))} articles from legacy data.json")
+            return data
+    except Exception as e:
+        logger.error(f"Failed to load storage: {e}")
+
+    return _empty_data()
+
+
+def save_data(data: dict, stats: Optional[CorpusStats] = None) -> None:
+    """
+    Persist to the segmented store (with the corpus BM25 stats, if given).
+    New articles are appended to their day's segment; a segment is rewritten
+    (atomically) only if its stored articles changed, and deleted once purged.
+    """
+    if stats is not None:
+        data["metadata"]["corpus_stats"] = stats.to_dict()
+
+    if BACKEND == "sqlite":
+        import storage_sqlite
+        written, rescored = storage_sqlite.save(data)
+        logger.info(
+            f"Saved {len(data.get('articles', []))} articles to {storage_sqlite.DB_FILE} "
+            f"({written} rows written, {rescored} scores updated)"
+        )
+        return
+
+    by_day: dict[str, list[dict]] = {}
+    for article in data.get("articles", []):
+        by_day.setdefault(_article_day(article), []).append(article)
+
+    loaded = data.get("segments", {})
+    DATA_DIR.mkdir(exist_ok=True)
+    appended = rewritten = 0
+    try:
+        for day in loaded.keys() - by_day.keys():
+            _segment_path(day).unlink(missing_ok=True)
+
+        for day, articles in by_day.items():
+            path = _segment_path(day)
+            keys = loaded.get(day, [])
+            stored = [_line_key(a) for a in articles[:len(keys)]]
+            if stored == keys and (path.exists() or not keys):
+                if len(articles) > len(keys):
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.writelines(_segment_line(a) for a in articles[len(keys):])
+                    appended += len(articles) - len(keys)
+            else:
+                _write_atomic(path, "".join(_segment_line(a) for a in articles))
+                rewritten += 1
+
+        _write_atomic(META_FILE, json.dumps(data["metadata"], ensure_ascii=False, indent=2))
+    except Exception as e:
+        logger.error(f"Failed to save storage: {e}")
         raise
 
+    data["segments"] = {
+        day: [_line_key(a) for a in articles] for day, articles in by_day.items()
+    }
+    if snapshot is not None:
+        snapshot.save(data, _fingerprint(), exclude=RUN_FIELDS)
+    if LEGACY_DATA_FILE.exists():
+        LEGACY_DATA_FILE.unlink()
+        logger.info("Migrated data.json to the segmented store")
+    logger.info(
+        f"Saved {len(data.get('articles', []))} articles to {DATA_DIR} "
+        f"({appended} appended, {rewritten} segments rewritten)"
+    )
+
+
+def top_stored_articles(articles: list[dict], n: int) -> list[dict]:
+    """
+    Top N of the scored corpus by score_normalized. With the sqlite backend
+    the order comes from the saved score index (call after save_data).
+    """
+    if BACKEND == "sqlite":
+        import storage_sqlite
+        return storage_sqlite.top_articles(n, articles)
+    return get_top_articles(articles, top_n=n)
 
-def purge_old_articles(articles: list[dict]) -> list[dict]:
-    """Remove articles older than RETENTION_DAYS."""
-    cutoff = datetime.now(timezone.utc) - timedelta(days=RETENTION_DAYS)
-    fresh = []
-    removed = 0
 
-    for article in articles:
-        date_str = article.get("published_date") or article.get("scrape_timestamp", "")
-        dt = _parse_date(date_str)
+def load_corpus_stats(data: dict) -> CorpusStats:
+    """
+    BM25 corpus stats persisted with the data, kept in sync incrementally by
+    purge_old_articles() / deduplicate(). Rebuilt from the articles' cached
+    analysis when missing or out of sync with the stored article count.
+    """
+    articles = data.get("articles", [])
+    saved = data.get("metadata", {}).get("corpus_stats")
+    if saved and saved.get("n_docs") == len(articles):
+        return CorpusStats.from_dict(saved)
+    logger.info(f"Rebuilding corpus stats from {len(articles)} stored articles")
+    return CorpusStats.from_articles(articles)
 
-        if dt is None:
-            fresh.append(article)
-            continue
 
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
+def purge_old_articles(
+    articles: list[dict], stats: Optional[CorpusStats] = None, near: Optional[NearDupIndex] = None,
+) -> list[dict]:
+    """
+    Remove articles whose day segment is older than RETENTION_DAYS (and take
+    them out of `stats` and `near`). Whole days expire together, so a purge
+    deletes segment files instead of rewriting them.
+    """
+    if BACKEND == "sqlite":
+        import storage_sqlite
+        fresh = storage_sqlite.purge(articles, _retention_cutoff(), stats)
+        if near is not None and len(fresh) < len(articles):
+            kept = {id(a) for a in fresh}
+            for article in articles:
+                if id(article) not in kept:
+                    near.remove(article)
+        return fresh
+
+    cutoff = _retention_cutoff().date().isoformat()
+    fresh = []
+    removed = 0
 
-        if dt >= cutoff:
+    for article in articles:
+        if _article_day(article) >= cutoff:
             fresh.append(article)
         else:
             removed += 1
+            if stats is not None:
+                stats.remove(article)
+            if near is not None:
+                near.remove(article)
 
     if removed:
         logger.info(f"Purged {removed} articles older than {RETENTION_DAYS} days")
@@ -114,72 +354,156 @@ def _normalize_title(title: str) -> str:
     return title.lower().strip()
 
 
-def deduplicate(existing: list[dict], new_articles: list[dict]) -> list[dict]:
+def _normalize_link(link: str) -> str:
+    """Lowercase + strip trailing slash for URL comparison."""
+    return link.rstrip("/").lower()
+
+
+class SeenIndex:
+    """
+    Normalized link + title index over stored articles.
+    Lets the fetch stage drop already-stored entries before paying for
+    full-page enrichment, and backs deduplicate().
+    """
+
+    def __init__(self, articles: Optional[list[dict]] = None):
+        self.links: set[str] = set()
+        self.titles: set[str] = set()
+        for article in articles or []:
+            self.add(article)
+
+    def add(self, article: dict) -> None:
+        # Near-duplicates clustered into the article count as seen too
+        for a in (article, *article.get("duplicates", ())):
+            link  = _normalize_link(a.get("link", ""))
+            title = _normalize_title(a.get("title", ""))
+            if link:
+                self.links.add(link)
+            if title:
+                self.titles.add(title)
+
+    def contains(self, article: dict) -> bool:
+        link  = _normalize_link(article.get("link", ""))
+        title = _normalize_title(article.get("title", ""))
+        return bool((link and link in self.links) or (title and title in self.titles))
+
+
+def seen_index(articles: list[dict]) -> SeenIndex:
+    """SeenIndex over the stored corpus: in-memory sets, or index probes with the sqlite backend."""
+    if BACKEND == "sqlite":
+        import storage_sqlite
+        return storage_sqlite.SqliteSeenIndex()
+    return SeenIndex(articles)
+
+
+def _cluster(story: dict, duplicate: dict) -> bool:
+    """Record `duplicate` on the stored story it rewrites. False if already recorded."""
+    duplicates = list(story.get("duplicates", ()))
+    link = _normalize_link(duplicate.get("link", ""))
+    if any(_normalize_link(d.get("link", "")) == link for d in duplicates):
+        return False
+    duplicates.append({
+        "source": duplicate.get("source", ""),
+        "title": duplicate.get("title", ""),
+        "link": duplicate.get("link", ""),
+    })
+    story["duplicates"] = duplicates
+    return True
+
+
+def deduplicate(
+    existing: list[dict], new_articles: list[dict], stats: Optional[CorpusStats] = None,
+    seen: Optional[SeenIndex] = None, near: Optional[NearDupIndex] = None,
+) -> list[dict]:
     """
     Merge new articles, deduplicating by:
     1. Normalized URL (catches same article with different tracking params)
     2. Exact title match (catches same article across different feeds/sources)
+    3. With `near` (NearDupIndex of `existing`): MinHash near-duplicates
+       (wire rewrites), recorded in the stored story's "duplicates" list
+       instead of being added
+    Added articles are counted into `stats`, if given.
+    `seen` is an index of `existing` (default: built from it).
     """
-    seen_links  = {a["link"].rstrip("/").lower() for a in existing}
-    seen_titles = {_normalize_title(a["title"]) for a in existing if a.get("title")}
-    added = 0
+    if seen is None:
+        seen = SeenIndex(existing)
+    added = clustered = 0
 
     for article in new_articles:
-        link  = article.get("link", "").rstrip("/").lower()
-        title = _normalize_title(article.get("title", ""))
-
         # Skip if URL or exact title already seen
-        if (link and link in seen_links) or (title and title in seen_titles):
+        if seen.contains(article):
             continue
 
+        if near is not None:
+            story = near.find(article)
+            if story is not None:
+                if _cluster(story, article):
+                    clustered += 1
+                seen.add(article)
+                continue
+
         existing.append(article)
-        if link:
-            seen_links.add(link)
-        if title:
-            seen_titles.add(title)
+        seen.add(article)
+        if near is not None:
+            near.add(article)
+        if stats is not None:
+            stats.add(article)
         added += 1
 
-    skipped = len(new_articles) - added
-    logger.info(f"Added {added} new unique articles (skipped {skipped} duplicates)")
+    skipped = len(new_articles) - added - clustered
+    logger.info(
+        f"Added {added} new unique articles "
+        f"(clustered {clustered} near-duplicates, skipped {skipped} duplicates)"
+    )
     return existing
 
 
-def update_storage(new_articles: list[dict]) -> tuple[list[dict], list[dict]]:
+def update_storage(
+    new_articles: list[dict], data: Optional[dict] = None, save: bool = True,
+    stats: Optional[CorpusStats] = None,
+) -> tuple[list[dict], list[dict]]:
     """
     Full storage update cycle.
+    `data` is the result of an earlier load_data() in the same run, if any,
+    and `stats` its load_corpus_stats(); both are updated in place.
+    With save=False the caller persists `data` itself (e.g. after scoring,
+    so cached scores are stored along with the articles).
     Returns (all_articles_after_purge, truly_new_articles).
     """
-    data = load_data()
+    if data is None:
+        data = load_data()
+    if stats is None:
+        stats = load_corpus_stats(data)
     existing = data.get("articles", [])
 
-    # Purge old first
-    existing = purge_old_articles(existing)
+    # Feed items already past retention would be stored, purged next run and
+    # fetched again the hour after, each time as a "new" article: drop them
+    cutoff = _retention_cutoff().timestamp()
+    expired = sum(article_ts(a) < cutoff for a in new_articles)
+    if expired:
+        new_articles = [a for a in new_articles if article_ts(a) >= cutoff]
+        logger.info(f"Dropped {expired} fetched articles older than {RETENTION_DAYS} days")
 
-    # Snapshot existing links BEFORE merge (to identify truly new ones)
-    existing_links = {a["link"].rstrip("/").lower() for a in existing}
+    # Near-dup index of the stored corpus, kept in step with it like `stats`
+    # (nothing to look up on a run without new articles)
+    near = NearDupIndex(existing) if new_articles else None
+
+    # Purge old first
+    existing = purge_old_articles(existing, stats, near)
 
     # Deduplicate and merge
-    merged = deduplicate(existing, new_articles)
-
-    # Truly new = articles that weren't in existing before this run
-    truly_new = [
-        a for a in new_articles
-        if a.get("link", "").rstrip("/").lower() not in existing_links
-    ]
-    # Also deduplicate truly_new itself (same fix)
-    seen = set()
-    truly_new_deduped = []
-    for a in truly_new:
-        link = a.get("link", "").rstrip("/").lower()
-        if link and link not in seen:
-            truly_new_deduped.append(a)
-            seen.add(link)
-    truly_new = truly_new_deduped
+    n_existing = len(existing)
+    merged = deduplicate(existing, new_articles, stats, seen_index(existing), near)
+
+    # Truly new = articles this run appended: not exact or near duplicates
+    # of a stored story (those only grow its "duplicates" list, no new alert)
+    truly_new = merged[n_existing:]
 
     # Update metadata
     data["articles"] = merged
     data["metadata"]["total_runs"] = data["metadata"].get("total_runs", 0) + 1
     data["metadata"]["sources"] = list({a["source"] for a in merged})
 
-    save_data(data)
+    if save:
+        save_data(data, stats)
     return merged, truly_new
\ No newline at end of file
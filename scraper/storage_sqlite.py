@@ -0,0 +1,222 @@
+"""
+storage_sqlite.py - Optional SQLite backend for storage.py.
+
+Selected with STORAGE_BACKEND=sqlite (environment). storage.load_data,
+save_data, update_storage, seen_index and top_stored_articles keep their
+interface and delegate here.
+
+One row per article. The article itself is a JSON body; the columns
+the pipeline queries are indexed:
+  - link_key   : unique normalized link (dedup probe, upsert target)
+  - title_norm : normalized title (dedup probe)
+  - ts         : UTC epoch of publication (retention = one DELETE)
+  - score      : score_normalized of the last run (top-N without a full load)
+Links of near-duplicates clustered into a stored story go to `aliases`,
+so they are recognized by the same probe.
+
+load() records each row's stored state in data["rows"] (link_key ->
+(_line_key, score)); save() then inserts new rows, rewrites the body of
+changed ones only, and touches the score column of the rest only when
+the run moved it.
+
+The database is a single file, DB_FILE. It is not committed by the
+hourly workflow: use this backend on a runner with a persistent disk.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from article import Article
+from dates import article_ts
+from scoring import CorpusStats
+from storage import (
+    RUN_FIELDS, SeenIndex, _empty_data, _line_key, _normalize_link, _normalize_title,
+)
+
+logger = logging.getLogger(__name__)
+
+DB_FILE = Path(__file__).parent.parent / "data.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id         INTEGER PRIMARY KEY,
+    link_key   TEXT NOT NULL,
+    title_norm TEXT,
+    ts         REAL NOT NULL,
+    score      REAL,
+    body       TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS articles_link  ON articles (link_key);
+CREATE INDEX        IF NOT EXISTS articles_title ON articles (title_norm);
+CREATE INDEX        IF NOT EXISTS articles_ts    ON articles (ts);
+CREATE INDEX        IF NOT EXISTS articles_score ON articles (score);
+CREATE TABLE IF NOT EXISTS aliases (
+    link_key TEXT PRIMARY KEY,
+    ts       REAL NOT NULL
+);
+CREATE INDEX        IF NOT EXISTS aliases_ts     ON aliases (ts);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_conn: Optional[sqlite3.Connection] = None
+_conn_lock = threading.Lock()
+
+
+def get_connection() -> sqlite3.Connection:
+    """Process-wide connection; the schema is created on first use."""
+    global _conn
+    if _conn is None:
+        with _conn_lock:
+            if _conn is None:
+                conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+                conn.executescript(SCHEMA)
+                _conn = conn
+    return _conn
+
+
+def _link_key(article: dict) -> str:
+    """Normalized link; link-less articles are keyed by title instead."""
+    return _normalize_link(article.get("link", "")) or "#" + _normalize_title(article.get("title", ""))
+
+
+def _row(article: dict) -> tuple:
+    stored = {k: v for k, v in article.items() if k not in RUN_FIELDS}
+    return (
+        _link_key(article),
+        _normalize_title(article.get("title", "")) or None,
+        article_ts(article),
+        article.get("score_normalized"),
+        json.dumps(stored, ensure_ascii=False, separators=(",", ":")),
+    )
+
+
+def load() -> dict:
+    conn = get_connection()
+    data = _empty_data()
+    meta = dict(conn.execute("SELECT key, value FROM meta"))
+    if "metadata" in meta:
+        data["metadata"] = json.loads(meta["metadata"])
+    rows = {}
+    for link_key, score, body in conn.execute("SELECT link_key, score, body FROM articles ORDER BY id"):
+        article = Article(json.loads(body))
+        data["articles"].append(article)
+        rows[link_key] = (_line_key(article), score)
+    data["rows"] = rows
+    return data
+
+
+def save(data: dict) -> tuple[int, int]:
+    """
+    Write new and changed articles, the scores that moved, and the metadata,
+    in one transaction. Returns (rows written, scores updated).
+    """
+    articles = data.get("articles", [])
+    loaded = data.get("rows", {})
+    written, rescored = [], []
+    for article in articles:
+        key = _link_key(article)
+        stored = loaded.get(key)
+        if stored is None or stored[0] != _line_key(article):
+            written.append(article)
+        elif stored[1] != article.get("score_normalized"):
+            rescored.append((article.get("score_normalized"), key))
+
+    conn = get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO articles (link_key, title_norm, ts, score, body) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (link_key) DO UPDATE SET title_norm = excluded.title_norm, "
+            "ts = excluded.ts, score = excluded.score, body = excluded.body",
+            (_row(a) for a in written),
+        )
+        conn.executemany("UPDATE articles SET score = ? WHERE link_key = ?", rescored)
+        # Aliases only change with an article's duplicates, i.e. its line key
+        conn.executemany(
+            "INSERT OR IGNORE INTO aliases (link_key, ts) VALUES (?, ?)",
+            ((_link_key(d), article_ts(a)) for a in written for d in a.get("duplicates", ())),
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            ("metadata", json.dumps(data["metadata"], ensure_ascii=False)),
+        )
+
+    data["rows"] = {_link_key(a): (_line_key(a), a.get("score_normalized")) for a in articles}
+    return len(written), len(rescored)
+
+
+def purge(articles: list[dict], cutoff: datetime, stats: Optional[CorpusStats] = None) -> list[dict]:
+    """
+    Retention as one indexed DELETE. Purged rows leave `stats` (their stored
+    body carries the same cached analysis as the loaded article) and are
+    dropped from the in-memory list by key, without parsing any date.
+    """
+    conn = get_connection()
+    with conn:
+        expired = conn.execute(
+            "SELECT link_key, body FROM articles WHERE ts < ?", (cutoff.timestamp(),)
+        ).fetchall()
+        conn.execute("DELETE FROM articles WHERE ts < ?", (cutoff.timestamp(),))
+        conn.execute("DELETE FROM aliases WHERE ts < ?", (cutoff.timestamp(),))
+
+    if not expired:
+        return articles
+    if stats is not None:
+        for _, body in expired:
+            stats.remove(json.loads(body))
+    expired_keys = {key for key, _ in expired}
+    logger.info(f"Purged {len(expired)} articles older than {cutoff.date()}")
+    return [a for a in articles if _link_key(a) not in expired_keys]
+
+
+class SqliteSeenIndex(SeenIndex):
+    """
+    SeenIndex answered by index probes on the stored articles; only the
+    articles added during this run (not yet saved) are kept in memory.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._conn = get_connection()
+
+    def contains(self, article: dict) -> bool:
+        if super().contains(article):
+            return True
+        link = _normalize_link(article.get("link", ""))
+        title = _normalize_title(article.get("title", ""))
+        row = self._conn.execute(
+            "SELECT 1 FROM articles WHERE link_key = ? OR title_norm = ? LIMIT 1",
+            (link or None, title or None),
+        ).fetchone()
+        if row is None and link:
+            row = self._conn.execute("SELECT 1 FROM aliases WHERE link_key = ?", (link,)).fetchone()
+        return row is not None
+
+
+def top_articles(n: int = 20, articles: Optional[list[dict]] = None) -> list[dict]:
+    """
+    Top N stored articles by last-run score_normalized, straight from the score
+    index (ties in insertion order, like scoring.get_top_articles). With
+    `articles` (the scored corpus, after save), the matching in-memory records
+    are returned; otherwise the stored bodies are parsed.
+    """
+    rows = get_connection().execute(
+        "SELECT link_key, body, score FROM articles WHERE score IS NOT NULL "
+        "ORDER BY score DESC, id LIMIT ?", (n,)
+    ).fetchall()
+    if articles is not None:
+        by_key = {_link_key(a): a for a in articles}
+        return [by_key[key] for key, _, _ in rows if key in by_key]
+    top = []
+    for _, body, score in rows:
+        article = json.loads(body)
+        article["score_normalized"] = score
+        top.append(article)
+    return top
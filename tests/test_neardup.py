@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scraper"))
+
+from neardup import NearDupIndex, signature, similarity  # noqa: E402
+
+BODY = (
+    "Shares of the largest lenders climbed in early trading after the central bank "
+    "signalled that it would keep its policy rate unchanged for the rest of the year, "
+    "while bond yields eased and the dollar slipped against most major currencies."
+)
+
+
+def _article(title: str, content: str = "") -> dict:
+    return {"title": title, "content": content, "link": f"https://example.com/{title}"}
+
+
+def test_short_headlines_are_not_near_duplicates():
+    pairs = [
+        ("Wall Street opens higher as investors assess earnings",
+         "Wall Street opens lower as investors assess earnings"),
+        ("FT Live: markets update", "FT Live: Asia markets update"),
+    ]
+    for a, b in pairs:
+        assert signature(a, "") == ""
+        index = NearDupIndex([_article(a)])
+        assert index.find(_article(b)) is None
+
+
+def test_rewrite_of_a_long_text_is_found():
+    original = _article("Banks rally as rates hold", BODY)
+    rewrite = _article("Banks rally as rates are held", BODY.replace("climbed", "rose"))
+    assert similarity(signature(original["title"], BODY), signature(rewrite["title"], rewrite["content"])) >= 0.5
+    assert NearDupIndex([original]).find(rewrite) is original